@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+#
+# HIS: Benchmark of HIS metric checker
+#
+# Times each phase of a run_checks run (dump file parsing, function
+# body visitor, each his_* metric) and measures its peak memory.
+# Dump files are generated by his_dumpgen.py if none are given.
+#
+# Example usage (best of 5 runs of generated dump file with 2000 functions)
+# python his_bench.py --functions 2000 --repeat 5
+#
+# Example usage (existing dump files, results stored as JSON)
+# python his_bench.py --json results.json file1.c.dump file2.c.dump
+#
+# Example usage (VOCF tally of token list declaring 100000 distinct identifiers)
+# python his_bench.py --functions 10 --identifiers 100000
+#
+# Example usage (throughput of plain versus compressed dump files)
+# python his_bench.py --functions 2000 --compression gz,xz,zst
+#
+
+import argparse
+import gzip
+import json
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import his
+import his_dumpgen
+
+
+# Functions and methods measured as phases of a run.
+# The first configuration of dump files is parsed by parseDumpFile.
+MODULE_PHASES = ['parseDumpFile', 'HisConfigurationIndex', 'HisTokenArrays']
+METHOD_PHASES = [
+    'collectFunctionBodies',
+    'visitFunctionBody',
+    'visitFunctionBodyArrays',
+    'visitTokenList',
+    'visitTokenListArrays',
+    'his_comf',
+    'his_path',
+    'his_goto',
+    'his_stcyc',
+    'his_calling',
+    'his_calls',
+    'his_param',
+    'his_stmt',
+    'his_level',
+    'his_return',
+    'his_vocf',
+    'his_calling_result',
+    'his_vocf_result',
+    'his_num_recursions'
+]
+
+
+# Collects time and memory of phases of one run
+class PhaseRecorder():
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.times = dict()
+        self.peaks = dict()
+
+    # Call function and add its time and memory to phase
+    def measure(self, phase, function, *args, **kwargs):
+        if self.trace_memory:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.times[phase] = self.times.get(phase, 0.0) + time.perf_counter() - start_time
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - start_memory
+                self.peaks[phase] = max(self.peaks.get(phase, 0), peak)
+
+    # Wrap function to measure each call as phase
+    def wrap(self, phase, function):
+        def measured(*args, **kwargs):
+            return self.measure(phase, function, *args, **kwargs)
+        return measured
+
+
+# Run run_checks of HIS metric checker once and record its phases
+def runChecks(his_args, trace_memory):
+    recorder = PhaseRecorder(trace_memory)
+    # Wrap at module and class level to measure dump file checkers
+    # of run_checks as well
+    wrapped = list()
+    for phase in MODULE_PHASES:
+        wrapped.append((his, phase, recorder.wrap(phase, getattr(his, phase))))
+    for phase in METHOD_PHASES:
+        wrapped.append((his.HisMetricChecker, phase, recorder.wrap(phase, getattr(his.HisMetricChecker, phase))))
+    originals = list()
+    for owner, phase, function in wrapped:
+        originals.append((owner, phase, owner.__dict__[phase]))
+        setattr(owner, phase, function)
+    stdout = sys.stdout
+    stderr = sys.stderr
+    devnull = open(os.devnull, 'w')
+    sys.stdout = devnull
+    sys.stderr = devnull
+    try:
+        if trace_memory:
+            tracemalloc.start()
+        his_checker = his.HisMetricChecker(his.parseArguments(his_args))
+        recorder.measure('run_checks', his_checker.run_checks)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        sys.stdout = stdout
+        sys.stderr = stderr
+        devnull.close()
+        for owner, phase, function in originals:
+            setattr(owner, phase, function)
+    return recorder
+
+
+# Run benchmark and return best time and peak memory of each phase
+def runBenchmark(dumpfiles, repeat, his_options):
+    his_args = ['-q', '--no-summary'] + his_options + dumpfiles
+    results = dict()
+    for run in range(repeat):
+        recorder = runChecks(his_args, False)
+        for phase in recorder.times:
+            result = results.setdefault(phase, {'time': recorder.times[phase], 'peak': 0})
+            result['time'] = min(result['time'], recorder.times[phase])
+    # Memory is measured by separate run since tracing slows down execution
+    recorder = runChecks(his_args, True)
+    for phase in recorder.peaks:
+        results.setdefault(phase, {'time': 0.0, 'peak': 0})['peak'] = recorder.peaks[phase]
+    return results
+
+
+# Print benchmark results as table
+def printResults(results):
+    his.printf("%s %12s %14s\n", "Phase".ljust(24), "Time [ms]", "Peak [KiB]")
+    for phase in MODULE_PHASES + METHOD_PHASES + ['run_checks']:
+        if phase in results:
+            his.printf("%s %12.1f %14.1f\n", phase.ljust(24),
+                       results[phase]['time'] * 1000.0, results[phase]['peak'] / 1024.0)
+
+
+# Write compressed copies of dump files to directory
+def compressDumpFiles(dumpfiles, extension, directory):
+    compressed_files = list()
+    for idx, dumpfile in enumerate(dumpfiles):
+        compressed_file = os.path.join(directory, '%d_%s.%s' % (idx, os.path.basename(dumpfile), extension))
+        with open(dumpfile, 'rb') as dump:
+            data = dump.read()
+        if extension == 'gz':
+            data = gzip.compress(data)
+        elif extension == 'xz':
+            data = lzma.compress(data)
+        elif his.zstd is not None:
+            data = his.zstd.compress(data)
+        else:
+            data = his.zstandard.ZstdCompressor().compress(data)
+        with open(compressed_file, 'wb') as dump:
+            dump.write(data)
+        compressed_files.append(compressed_file)
+    return compressed_files
+
+
+# Run benchmark of plain and compressed dump files and return best
+# time of run_checks, size of input and throughput of each format
+def runCompressionBenchmark(dumpfiles, repeat, his_options, extensions):
+    plain_size = sum(os.path.getsize(dumpfile) for dumpfile in dumpfiles)
+    results = dict()
+    compressed_dir = tempfile.mkdtemp(prefix='his_bench_')
+    try:
+        for extension in ['plain'] + extensions:
+            if extension == 'plain':
+                input_files = dumpfiles
+            else:
+                input_files = compressDumpFiles(dumpfiles, extension, compressed_dir)
+            best_time = min(runChecks(['-q', '--no-summary'] + his_options + input_files, False).times['run_checks']
+                            for run in range(repeat))
+            results[extension] = {
+                'time'      : best_time,
+                'size'      : sum(os.path.getsize(input_file) for input_file in input_files),
+                'throughput': plain_size / best_time
+            }
+    finally:
+        shutil.rmtree(compressed_dir)
+    return results
+
+
+# Print compression benchmark results as table. Throughput is
+# measured in uncompressed dump file data per second.
+def printCompressionResults(results):
+    his.printf("%s %12s %14s %20s\n", "Input".ljust(24), "Time [ms]", "Size [KiB]", "Throughput [MiB/s]")
+    for extension in results:
+        his.printf("%s %12.1f %14.1f %20.2f\n", extension.ljust(24), results[extension]['time'] * 1000.0,
+                   results[extension]['size'] / 1024.0, results[extension]['throughput'] / (1024.0 * 1024.0))
+
+
+# Create parser of command line arguments
+def createArgumentParser():
+    parser = argparse.ArgumentParser(description='Benchmark HIS metric checker')
+    parser.add_argument("dumpfile", nargs='*', help="dump files to check (default: generated dump file)")
+    his_dumpgen.addGeneratorArguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs to take best time of (default: 3)")
+    parser.add_argument("--his-options", type=str, default='', help="additional options of HIS addon, e.g. \"--suppress-metrics=COMF\"")
+    parser.add_argument("--json", type=str, help="file to store benchmark results as JSON")
+    parser.add_argument("--compression", type=str, help="compare throughput of plain and compressed dump files (comma-separated: gz, xz, zst)")
+    return parser
+
+
+# Main entry function
+def main():
+    parser = createArgumentParser()
+    args = parser.parse_args()
+    extensions = args.compression.split(',') if args.compression else list()
+    for extension in extensions:
+        if extension not in ['gz', 'xz', 'zst']:
+            parser.error("unknown compression: %s" % extension)
+        if extension == 'zst' and his.zstd is None and his.zstandard is None:
+            parser.error("zst compression requires module zstandard")
+
+    dumpfiles = args.dumpfile
+    generated_dir = None
+    if not dumpfiles:
+        generated_dir = tempfile.mkdtemp(prefix='his_bench_')
+        args.dumpfile = os.path.join(generated_dir, 'synthetic.c.dump')
+        his_dumpgen.generateDumpFile(args)
+        dumpfiles = [args.dumpfile]
+
+    try:
+        if extensions:
+            results = runCompressionBenchmark(dumpfiles, args.repeat, args.his_options.split(), extensions)
+        else:
+            results = runBenchmark(dumpfiles, args.repeat, args.his_options.split())
+    finally:
+        if generated_dir is not None:
+            shutil.rmtree(generated_dir)
+
+    if extensions:
+        printCompressionResults(results)
+    else:
+        printResults(results)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(results, json_file, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
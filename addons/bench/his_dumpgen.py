@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+#
+# HIS: Synthetic Cppcheck dump file generator
+#
+# Writes dump files in the structure cppcheckdata.py expects, without
+# running Cppcheck. Used to benchmark HIS metric checkers.
+#
+# Example usage (dump file with 1000 functions and 4 configurations)
+# python his_dumpgen.py --functions 1000 --configurations 4 synthetic.c.dump
+#
+# Example usage (dump files sharing 20 functions defined in his_synthetic.h)
+# python his_dumpgen.py --header-functions 20 --seed 1 a.c.dump
+# python his_dumpgen.py --header-functions 20 --seed 2 b.c.dump
+#
+# Example usage (dump file declaring 100000 distinct global identifiers)
+# python his_dumpgen.py --functions 10 --identifiers 100000 synthetic.c.dump
+#
+
+import argparse
+import os
+import random
+from xml.sax.saxutils import quoteattr
+
+
+# Control statement keywords used to nest compound statements
+NESTING_KEYWORDS = ['if', 'for', 'while', 'do']
+
+
+# Generated dump file content of one configuration
+class DumpBuilder():
+    def __init__(self, source_file):
+        self.source_file = source_file
+        self.files = [source_file]
+        self.file_index = 0
+        self.next_id = 1
+        self.linenr = 1
+        self.column = 1
+        self.tokens = list()
+        self.raw_tokens = list()
+        self.scopes = list()
+        self.scope_stack = list()
+        self.functions = list()
+        self.variables = list()
+
+    # Get a new unique element id
+    def newId(self):
+        element_id = '%x' % self.next_id
+        self.next_id += 1
+        return element_id
+
+    # Continue with next source line
+    def newLine(self):
+        self.linenr += 1
+        self.column = 1
+
+    # Continue with first line of given file
+    def openFile(self, filename):
+        if filename not in self.files:
+            self.files.append(filename)
+        self.file_index = self.files.index(filename)
+        self.linenr = 1
+        self.column = 1
+
+    # Add token to token list and raw token list. Like Cppcheck, raw
+    # tokens of headers aren't part of raw token list.
+    def addToken(self, string, **attrs):
+        token = {'id': self.newId(), 'str': string, 'file': self.files[self.file_index],
+                 'linenr': self.linenr, 'column': self.column}
+        if self.scope_stack:
+            token['scope'] = self.scope_stack[-1]['id']
+        if string[0].isalpha() or string[0] == '_':
+            token['type'] = 'name'
+        elif string[0].isdigit():
+            token['type'] = 'number'
+        token.update(attrs)
+        self.tokens.append(token)
+        if self.file_index == 0:
+            self.raw_tokens.append((self.file_index, self.linenr, self.column, string))
+        self.column += len(string) + 1
+        return token
+
+    # Add comment to raw token list only
+    def addComment(self, text):
+        if self.file_index == 0:
+            self.raw_tokens.append((self.file_index, self.linenr, self.column, '// ' + text))
+        self.newLine()
+
+    # Add scope and open its body
+    def openScope(self, scope_type, class_name='', function=None):
+        scope = {'id': self.newId(), 'type': scope_type, 'className': class_name}
+        if self.scope_stack:
+            scope['nestedIn'] = self.scope_stack[-1]['id']
+        if function is not None:
+            scope['function'] = function['id']
+        self.scopes.append(scope)
+        self.scope_stack.append(scope)
+        body_start = self.addToken('{')
+        scope['bodyStart'] = body_start['id']
+        return scope
+
+    # Close body of innermost scope
+    def closeScope(self):
+        scope = self.scope_stack[-1]
+        body_start = self.findToken(scope['bodyStart'])
+        body_end = self.addToken('}', link=body_start['id'])
+        body_start['link'] = body_end['id']
+        scope['bodyEnd'] = body_end['id']
+        self.scope_stack.pop()
+
+    # Find token by id. Searches backwards since it's used for open brackets.
+    def findToken(self, token_id):
+        for token in reversed(self.tokens):
+            if token['id'] == token_id:
+                return token
+        return None
+
+    # Add parenthesized token sequence
+    def addParentheses(self, strings, **attrs):
+        open_paren = self.addToken('(', **attrs)
+        for string in strings:
+            self.addToken(string)
+        close_paren = self.addToken(')', link=open_paren['id'])
+        open_paren['link'] = close_paren['id']
+        return open_paren
+
+    # Add function call "name(argument)"
+    def addFunctionCall(self, callee, argument):
+        name = self.addToken(callee['name'], function=callee['id'])
+        open_paren = self.addParentheses([argument], astOperand1=name['id'])
+        name['astParent'] = open_paren['id']
+
+    # Declare function which is defined later on
+    def declareFunction(self, name, num_params, function_type='Function'):
+        function = {'id': self.newId(), 'name': name, 'type': function_type, 'args': list()}
+        for nr in range(num_params):
+            function['args'].append(self.newId())
+        self.functions.append(function)
+        return function
+
+    # Add function definition header "int name(int p0, ...)"
+    def addFunctionHeader(self, function):
+        self.addToken('int')
+        name = self.addToken(function['name'], function=function['id'])
+        function['token'] = name['id']
+        open_paren = self.addToken('(')
+        for nr, variable_id in enumerate(function['args']):
+            if nr > 0:
+                self.addToken(',')
+            type_token = self.addToken('int')
+            name_token = self.addToken('p%d' % nr, variable=variable_id)
+            self.variables.append({'id': variable_id, 'nameToken': name_token['id'],
+                                   'typeStartToken': type_token['id'], 'typeEndToken': type_token['id']})
+        close_paren = self.addToken(')', link=open_paren['id'])
+        open_paren['link'] = close_paren['id']
+
+
+# Generator of synthetic translation unit
+class DumpGenerator():
+    def __init__(self, args):
+        self.args = args
+        self.random = random.Random(args.seed)
+
+    # Generate nested compound statements up to given depth
+    def addNesting(self, builder, depth):
+        if depth == 0:
+            builder.addToken('r')
+            builder.addToken('=')
+            builder.addToken('r')
+            builder.addToken('+')
+            builder.addToken('1')
+            builder.addToken(';')
+            builder.newLine()
+            return
+        keyword = NESTING_KEYWORDS[depth % len(NESTING_KEYWORDS)]
+        scope_type = keyword.capitalize()
+        builder.addToken(keyword)
+        if keyword == 'do':
+            builder.openScope(scope_type)
+            builder.newLine()
+            self.addNesting(builder, depth - 1)
+            builder.closeScope()
+            builder.addToken('while')
+            builder.addParentheses(['r', '<', '3'])
+            builder.addToken(';')
+        else:
+            builder.addParentheses(['r', '<', str(depth)])
+            builder.openScope(scope_type)
+            builder.newLine()
+            self.addNesting(builder, depth - 1)
+            builder.closeScope()
+        builder.newLine()
+
+    # Generate switch statement with given number of cases
+    def addSwitch(self, builder):
+        builder.addToken('switch')
+        builder.addParentheses(['r'])
+        builder.openScope('Switch')
+        builder.newLine()
+        for case in range(self.args.switch_cases):
+            for string in ['case', str(case), ':', 'r', '=', str(case), ';', 'break', ';']:
+                builder.addToken(string)
+            builder.newLine()
+        for string in ['default', ':', 'break', ';']:
+            builder.addToken(string)
+        builder.newLine()
+        builder.closeScope()
+        builder.newLine()
+
+    # Generate lambda function "auto l = [](int x) { return x; };"
+    def addLambda(self, builder, lambda_function):
+        builder.addToken('auto')
+        builder.addToken('l')
+        builder.addToken('=')
+        bracket = builder.addToken('[', function=lambda_function['id'])
+        lambda_function['token'] = bracket['id']
+        builder.addToken(']')
+        builder.addParentheses(['int', 'x'])
+        builder.openScope('Lambda', '[', lambda_function)
+        for string in ['return', 'x', ';']:
+            builder.addToken(string)
+        builder.closeScope()
+        builder.addToken(';')
+        builder.newLine()
+
+    # Generate global variable declarations "int g0;" with distinct names
+    def addIdentifiers(self, builder):
+        for idx in range(self.args.identifiers):
+            for string in ['int', 'g%d' % idx, ';']:
+                builder.addToken(string)
+            builder.newLine()
+
+    # Generate function definition
+    def addFunction(self, builder, function, callees, lambda_function):
+        builder.addComment('Function %s' % function['name'])
+        builder.addFunctionHeader(function)
+        builder.newLine()
+        builder.openScope('Function', function['name'], function)
+        builder.newLine()
+        for string in ['int', 'r', '=', '0', ';']:
+            builder.addToken(string)
+        builder.newLine()
+        self.addNesting(builder, self.args.depth)
+        if self.args.switch_cases > 0:
+            self.addSwitch(builder)
+        if lambda_function is not None:
+            self.addLambda(builder, lambda_function)
+        for callee in callees:
+            builder.addToken('r')
+            builder.addToken('+=')
+            builder.addFunctionCall(callee, 'r')
+            builder.addToken(';')
+            builder.newLine()
+        builder.addToken('if')
+        builder.addParentheses(['r'])
+        builder.openScope('If')
+        for string in ['return', 'r', ';']:
+            builder.addToken(string)
+        builder.closeScope()
+        builder.newLine()
+        for string in ['return', '0', ';']:
+            builder.addToken(string)
+        builder.newLine()
+        builder.closeScope()
+        builder.newLine()
+
+    # Generate content of translation unit
+    def generate(self, source_file):
+        builder = DumpBuilder(source_file)
+        builder.openScope('Global')
+        global_scope = builder.scopes[0]
+        # Functions defined in header are the same in all dump files
+        header_functions = list()
+        if self.args.header_functions > 0:
+            builder.openFile(os.path.join(os.path.dirname(source_file), 'his_synthetic.h'))
+            for idx in range(self.args.header_functions):
+                header_functions.append(builder.declareFunction('hfunc%d' % idx, self.args.params))
+            for idx, function in enumerate(header_functions):
+                self.addFunction(builder, function, header_functions[max(idx - 1, 0):idx], None)
+            builder.openFile(source_file)
+        self.addIdentifiers(builder)
+        functions = list()
+        for idx in range(self.args.functions):
+            functions.append(builder.declareFunction('func%d' % idx, self.args.params))
+        for function in functions:
+            callees = [self.random.choice(header_functions + functions) for fanout in range(self.args.fan_out)]
+            lambda_function = None
+            if self.random.random() < self.args.lambda_density:
+                lambda_function = builder.declareFunction('[', 0, 'Lambda')
+            self.addFunction(builder, function, callees, lambda_function)
+        # Global scope has no brackets
+        builder.scope_stack.pop()
+        builder.tokens.pop(0)
+        builder.raw_tokens.pop(0)
+        del global_scope['bodyStart']
+        return builder
+
+
+# XML attribute string of dictionary
+def xmlAttributes(attrs, keys):
+    result = ''
+    for key in keys:
+        if key in attrs:
+            result += ' %s=%s' % (key, quoteattr(str(attrs[key])))
+    return result
+
+
+# Write dump file of generated translation unit
+def writeDumpFile(dump, builder, configurations, language):
+    token_keys = ['id', 'file', 'linenr', 'column', 'str', 'scope', 'type', 'link',
+                  'function', 'variable', 'astParent', 'astOperand1']
+    scope_keys = ['id', 'type', 'className', 'bodyStart', 'bodyEnd', 'nestedIn', 'function']
+    lines = list()
+    lines.append('  <tokenlist>\n')
+    for token in builder.tokens:
+        lines.append('    <token%s/>\n' % xmlAttributes(token, token_keys))
+    lines.append('  </tokenlist>\n')
+    lines.append('  <scopes>\n')
+    for scope in builder.scopes:
+        lines.append('    <scope%s>\n' % xmlAttributes(scope, scope_keys))
+        if scope['type'] == 'Global':
+            lines.append('      <functionList>\n')
+            for function in builder.functions:
+                lines.append('        <function id="%s" token="%s" tokenDef="%s" name=%s type="%s" access="Public">\n' %
+                             (function['id'], function['token'], function['token'],
+                              quoteattr(function['name']), function['type']))
+                for nr, variable_id in enumerate(function['args']):
+                    lines.append('          <arg nr="%d" variable="%s"/>\n' % (nr + 1, variable_id))
+                lines.append('        </function>\n')
+            lines.append('      </functionList>\n')
+        lines.append('    </scope>\n')
+    lines.append('  </scopes>\n')
+    lines.append('  <variables>\n')
+    for variable in builder.variables:
+        lines.append('    <var id="%s" nameToken="%s" typeStartToken="%s" typeEndToken="%s" access="Argument" '
+                     'constness="0" volatileness="0" isArray="false" isClass="false" isConst="false" '
+                     'isExtern="false" isPointer="false" isReference="false" isStatic="false" isVolatile="false"/>\n' %
+                     (variable['id'], variable['nameToken'], variable['typeStartToken'], variable['typeEndToken']))
+    lines.append('  </variables>\n')
+    configuration = ''.join(lines)
+
+    dump.write('<?xml version="1.0"?>\n')
+    dump.write('<dumps language="%s">\n' % language)
+    dump.write('  <platform name="native" char_bit="8" short_bit="16" int_bit="32" long_bit="64" '
+               'long_long_bit="64" float_bit="32" double_bit="64" long_double_bit="128" '
+               'pointer_bit="64" wchar_t_bit="32" size_t_bit="64"/>\n')
+    for cfg_idx in range(configurations):
+        cfg_name = '' if cfg_idx == 0 else 'CFG_%d' % cfg_idx
+        dump.write('<dump cfg=%s>\n' % quoteattr(cfg_name))
+        dump.write('  <standards>\n    <c version="c11"/>\n    <cpp version="c++17"/>\n  </standards>\n')
+        dump.write(configuration)
+        dump.write('</dump>\n')
+    dump.write('  <rawtokens>\n')
+    for file_index, filename in enumerate(builder.files):
+        dump.write('    <file index="%d" name=%s/>\n' % (file_index, quoteattr(filename)))
+    for file_index, linenr, column, string in builder.raw_tokens:
+        dump.write('    <tok fileIndex="%d" linenr="%d" column="%d" str=%s/>\n' %
+                   (file_index, linenr, column, quoteattr(string)))
+    dump.write('  </rawtokens>\n')
+    dump.write('  <suppressions>\n  </suppressions>\n')
+    dump.write('</dumps>\n')
+
+
+# Add arguments describing generated dump file content to parser
+def addGeneratorArguments(parser):
+    parser.add_argument("--functions", type=int, default=100, help="number of functions (default: 100)")
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of compound statements per function (default: 3)")
+    parser.add_argument("--switch-cases", type=int, default=4, help="number of switch cases per function (default: 4)")
+    parser.add_argument("--lambda-density", type=float, default=0.0, help="fraction of functions containing a lambda function (default: 0.0)")
+    parser.add_argument("--fan-out", type=int, default=3, help="number of function calls per function (default: 3)")
+    parser.add_argument("--params", type=int, default=2, help="number of function parameters (default: 2)")
+    parser.add_argument("--header-functions", type=int, default=0, help="number of functions defined in header his_synthetic.h (default: 0)")
+    parser.add_argument("--identifiers", type=int, default=0, help="number of distinct global identifiers declared (default: 0)")
+    parser.add_argument("--configurations", type=int, default=1, help="number of configurations (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of call graph generator (default: 0)")
+
+
+# Create parser of command line arguments
+def createArgumentParser():
+    parser = argparse.ArgumentParser(description='Generate synthetic Cppcheck dump file')
+    parser.add_argument("dumpfile", help="dump file to write")
+    addGeneratorArguments(parser)
+    return parser
+
+
+# Generate dump file according to arguments
+def generateDumpFile(args):
+    source_file = args.dumpfile[:-len('.dump')] if args.dumpfile.endswith('.dump') else args.dumpfile
+    # Lambda functions require C++
+    if args.lambda_density > 0.0 or source_file.endswith('.cpp'):
+        language = 'cpp'
+    else:
+        language = 'c'
+    builder = DumpGenerator(args).generate(source_file)
+    with open(args.dumpfile, 'w') as dump:
+        writeDumpFile(dump, builder, args.configurations, language)
+
+
+# Main entry function
+def main():
+    args = createArgumentParser().parse_args()
+    generateDumpFile(args)
+
+if __name__ == '__main__':
+    main()
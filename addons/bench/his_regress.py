@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+#
+# HIS: Regression checks of HIS addon modes
+#
+# Runs his.py in several modes on dump files generated by his_dumpgen.py
+# and compares their output with a serial run of the same dump files.
+# Progress lines ("Checking ...") are ignored. Exits with 1 if the output
+# of a mode differs.
+#
+# Example usage (all checks)
+# python his_regress.py
+#
+# Example usage (summary store only, 5 dump files of 200 functions each)
+# python his_regress.py --dumpfiles 5 --functions 200 summary-store
+#
+
+import argparse
+import difflib
+import importlib.util
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import his_dumpgen
+
+
+# HIS addon checked
+HIS_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'his.py')
+
+
+# Lines written to stdout and stderr by HIS addon.
+# Streams None aren't compared. Output is compared with expected
+# output if given, with output of serial run otherwise.
+class HisOutput():
+    def __init__(self, stdout, stderr, expected=None, returncode=0):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.expected = expected
+        self.returncode = returncode
+
+
+# Run HIS addon with given arguments and return its output
+# without progress lines
+def runHis(his_args):
+    result = subprocess.run([sys.executable, HIS_SCRIPT] + his_args, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    stdout = [line for line in result.stdout.splitlines() if not line.startswith('Checking ')]
+    return HisOutput(stdout, result.stderr.splitlines(), returncode=result.returncode)
+
+
+# Profile printed after summary. The profile itself differs per run.
+def checkProfile(context):
+    output = runHis(['--profile'] + context.dumpfiles)
+    if '--- Profile information' not in output.stdout:
+        output.stdout.append('(no profile printed)')
+        return output
+    # Profile starts with empty line and separator
+    output.stdout = output.stdout[:output.stdout.index('--- Profile information') - 2]
+    return output
+
+
+# Diagnostic line of JSON error message as printed by HIS addon
+def textDiagnostic(message):
+    if message['linenr'] == 0:
+        location = '[%s:---]' % message['file']
+    else:
+        location = '[%s:%d]' % (message['file'], message['linenr'])
+    return '%s (%s) %s [%s-%s]' % (location, message['severity'], message['message'],
+                                   message['addon'], message['errorId'])
+
+
+# Send requests to server and return its responses
+def requestServer(path, requests):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    responses = list()
+    with client, client.makefile('rw') as connection:
+        for request in requests:
+            connection.write(json.dumps(request) + '\n')
+            connection.flush()
+            responses.append(json.loads(connection.readline()))
+    return responses
+
+
+# Server answering each dump file checked one after another. Diagnostics
+# of server are complete per dump file, diagnostics of functions defined
+# in headers repeated by later dump files are removed. Results across
+# dump files are taken from the last response. The first dump file is
+# checked again, which has to replace its results. Its results across
+# dump files are merged last, so these are compared sorted. Another connection
+# is kept open meanwhile, which must not block the requests.
+def checkServer(context):
+    path = os.path.join(context.directory, 'his.sock')
+    server = subprocess.Popen([sys.executable, HIS_SCRIPT, '--server', path])
+    try:
+        for retry in range(300):
+            if os.path.exists(path) or server.poll() is not None:
+                break
+            time.sleep(0.1)
+        requests = [{'dumpfile': dumpfile} for dumpfile in context.dumpfiles + context.dumpfiles[:1]]
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle_client:
+            idle_client.connect(path)
+            responses = requestServer(path, requests)
+            requestServer(path, [{'command': 'shutdown'}])
+    finally:
+        try:
+            server.wait(60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    lines = list()
+    for response in responses[:-1]:
+        for message in response.get('diagnostics', list()):
+            line = textDiagnostic(message)
+            if line not in lines:
+                lines.append(line)
+        if 'error' in response:
+            lines.append(response['error'])
+    if responses[-1].get('diagnostics') != responses[0].get('diagnostics'):
+        lines.append('(diagnostics of dump file checked again differ)')
+    lines += crossFileDiagnostics(textDiagnostic(message)
+                                  for message in responses[-1].get('project_diagnostics', list()))
+    cross_file_lines = crossFileDiagnostics(context.serial.stderr)
+    cross_file_line_set = set(cross_file_lines)
+    expected = [line for line in context.serial.stderr if line not in cross_file_line_set] + cross_file_lines
+    return HisOutput(None, lines, HisOutput(None, expected))
+
+
+# Results cached by first run and taken from cache by second run.
+# Both runs are compared with the serial run.
+def checkCache(context):
+    cache_dir = os.path.join(context.directory, 'cache')
+    output = HisOutput(list(), list())
+    expected = HisOutput(list(), list())
+    for run in range(2):
+        cache_output = runHis(['--cache-dir', cache_dir] + context.dumpfiles)
+        output.stdout += cache_output.stdout
+        output.stderr += cache_output.stderr
+        expected.stdout += context.serial.stdout
+        expected.stderr += context.serial.stderr
+    output.expected = expected
+    return output
+
+
+# Dump files checked in parallel, results merged in order of dump files
+def checkJobs(context):
+    return runHis(['-j', '2'] + context.dumpfiles)
+
+
+# Dump files of source directory written by stub of Cppcheck and checked
+# in parallel. Cppcheck fails for one source file, since a directory is in
+# the way of its dump file. Its failure is reported and the run exits with 1.
+def checkDriver(context):
+    source_directory = os.path.join(context.directory, 'sources')
+    os.mkdir(source_directory)
+    dumpfiles = list()
+    for name in ['a.c', 'b.c', 'c.c']:
+        source_file = os.path.join(source_directory, name)
+        open(source_file, 'w').close()
+        if name == 'b.c':
+            os.mkdir(source_file + '.dump')
+            failed_dumpfile = source_file + '.dump'
+        else:
+            dumpfiles.append(source_file + '.dump')
+    stub = '"%s" "%s" --functions %d' % (sys.executable, os.path.join(os.path.dirname(__file__), 'his_stubdump.py'),
+                                         context.args.functions)
+    output = runHis(['--source-dir', source_directory, '--cppcheck', stub, '--dump-jobs', '2', '-j', '2'])
+    output.stderr.append('(exit code %d)' % output.returncode)
+    expected = runHis(dumpfiles)
+    expected.stderr = ["Failed to write dump file %s (exit code 1)" % failed_dumpfile] + expected.stderr + [
+        "Cppcheck failed for 1 source files", '(exit code 1)']
+    output.expected = expected
+    return output
+
+
+# Dump files checked by map runs of one dump file each, partial results
+# merged by reduce run. Map runs print nothing but their progress.
+def checkMapReduce(context):
+    shards = list()
+    output = HisOutput(list(), list())
+    for idx, dumpfile in enumerate(context.dumpfiles):
+        shards.append(os.path.join(context.directory, 'shard%d.his.gz' % idx))
+        map_output = runHis(['--map', shards[-1], dumpfile])
+        output.stdout += map_output.stdout
+        output.stderr += map_output.stderr
+    reduce_output = runHis(['--reduce'] + shards)
+    output.stdout += reduce_output.stdout
+    output.stderr += reduce_output.stderr
+    return output
+
+
+# Read output of watch run until summary of round has been printed.
+# Diagnostics are read from file stderr is written to.
+def readWatchRound(watch, stderr_file):
+    stdout = list()
+    while True:
+        line = watch.stdout.readline()
+        if not line:
+            stdout.append('(watch run stopped)')
+            break
+        line = line.rstrip('\n')
+        if line.startswith('Checking '):
+            continue
+        stdout.append(line)
+        if not line and '--- Summary of violations' in stdout:
+            break
+    return HisOutput(stdout, stderr_file.read().splitlines())
+
+
+# Sorted diagnostic lines of results across dump files. Results of a
+# changed dump file are merged after results of unchanged dump files.
+def crossFileDiagnostics(lines):
+    return sorted(line for line in lines
+                  if line.startswith('[All files:') or diagnosticMetric(line) in ['CALLING', 'NRECUR'])
+
+
+# Dump files of directory polled by watch run. Each round is compared
+# with a serial run of the dump files of the directory at that time:
+# all dump files first, then with the first dump file replaced by a
+# dump file of other functions, then with the last one removed. Later
+# rounds print diagnostics of changed dump files only, so only their
+# summary and results across dump files are compared.
+def checkWatch(context):
+    directory = os.path.join(context.directory, 'watch')
+    os.mkdir(directory)
+    dumpfiles = list()
+    for dumpfile in context.dumpfiles:
+        dumpfiles.append(os.path.join(directory, os.path.basename(dumpfile)))
+        shutil.copyfile(dumpfile, dumpfiles[-1])
+    output = HisOutput(list(), list())
+    expected = HisOutput(list(), list())
+    stderr_path = os.path.join(context.directory, 'watch.err')
+    with open(stderr_path, 'w') as stderr_write, open(stderr_path) as stderr_file:
+        watch = subprocess.Popen([sys.executable, HIS_SCRIPT, '--watch', '--watch-interval', '0.1', directory],
+                                 stdout=subprocess.PIPE, stderr=stderr_write, universal_newlines=True)
+        # Output of watch run stops if it hangs
+        timer = threading.Timer(300, watch.kill)
+        timer.start()
+        try:
+            for change in range(3):
+                if change == 1:
+                    # Replace first dump file at once, it would be checked while written otherwise
+                    dump_args = argparse.Namespace(**vars(context.args))
+                    dump_args.dumpfile = os.path.join(context.directory, 'replaced.c.dump')
+                    dump_args.seed = context.args.seed + len(dumpfiles)
+                    his_dumpgen.generateDumpFile(dump_args)
+                    os.replace(dump_args.dumpfile, dumpfiles[0])
+                elif change == 2:
+                    os.remove(dumpfiles.pop())
+                watch_round = readWatchRound(watch, stderr_file)
+                serial = runHis(dumpfiles)
+                output.stdout += watch_round.stdout
+                expected.stdout += serial.stdout
+                if change == 0:
+                    output.stderr += watch_round.stderr
+                    expected.stderr += serial.stderr
+                else:
+                    output.stderr += crossFileDiagnostics(watch_round.stderr)
+                    expected.stderr += crossFileDiagnostics(serial.stderr)
+        finally:
+            watch.send_signal(signal.SIGINT)
+            watch.wait()
+            timer.cancel()
+    output.expected = expected
+    return output
+
+
+# Token arrays disabled. Token arrays are used for configurations of
+# at least 20000 tokens if NumPy is installed, so a dump file of enough
+# functions is checked with and without them. The check is skipped if
+# NumPy isn't installed.
+def checkNoNumpy(context):
+    if importlib.util.find_spec('numpy') is None:
+        return None
+    large_directory = os.path.join(context.directory, 'large')
+    os.mkdir(large_directory)
+    dump_args = argparse.Namespace(**vars(context.args))
+    dump_args.dumpfile = os.path.join(large_directory, 'large.c.dump')
+    dump_args.functions = max(context.args.functions, 250)
+    his_dumpgen.generateDumpFile(dump_args)
+    output = runHis(['--no-numpy', dump_args.dumpfile])
+    output.expected = runHis([dump_args.dumpfile])
+    return output
+
+
+# Remove block of output starting with separator in front of title.
+# Marks output if block is missing.
+def removeBlock(lines, title):
+    if title not in lines:
+        return lines + ['(%s missing)' % title]
+    return lines[:lines.index(title) - 1]
+
+
+# Functions of dump files are new compared to baseline saved from
+# another dump file. The other dump file is written to a directory of
+# its own, so it doesn't share header functions. Statements changed
+# are printed after summary.
+def checkBaselineNew(context):
+    baseline = os.path.join(context.directory, 'new.json')
+    other_directory = os.path.join(context.directory, 'other')
+    os.mkdir(other_directory)
+    dump_args = argparse.Namespace(**vars(context.args))
+    dump_args.dumpfile = os.path.join(other_directory, 'other.c.dump')
+    his_dumpgen.generateDumpFile(dump_args)
+    runHis(['--save-baseline', baseline, dump_args.dumpfile])
+    output = runHis(['--baseline', baseline] + context.dumpfiles)
+    output.stdout = removeBlock(output.stdout, '--- Statements changed since baseline')
+    return output
+
+
+# Metric of diagnostic line
+def diagnosticMetric(line):
+    return line.rsplit('[HIS-', 1)[-1].rstrip(']')
+
+
+# Functions of dump files are unchanged compared to baseline saved from
+# the same dump files. Metrics of single functions aren't reported for
+# them, metrics across functions are. Summary isn't compared.
+def checkBaselineUnchanged(context):
+    baseline = os.path.join(context.directory, 'unchanged.json')
+    runHis(['--save-baseline', baseline] + context.dumpfiles)
+    output = runHis(['--baseline', baseline] + context.dumpfiles)
+    function_metrics = ['PATH', 'STCYC', 'CALLS', 'PARAM', 'STMT', 'LEVEL', 'RETURN']
+    expected = [line for line in context.serial.stderr if diagnosticMetric(line) not in function_metrics]
+    return HisOutput(None, output.stderr, HisOutput(None, expected))
+
+
+# Baseline saved by run doesn't change its output
+def checkSaveBaseline(context):
+    return runHis(['--save-baseline', os.path.join(context.directory, 'saved.json')] + context.dumpfiles)
+
+
+# Summary store written and linked by the same run
+def checkSummaryStoreLink(context):
+    summary_store = os.path.join(context.directory, 'link.db')
+    return runHis(['--summary-store', summary_store, '--link'] + context.dumpfiles)
+
+
+# Summary store written by one run and linked by another one
+def checkSummaryStore(context):
+    summary_store = os.path.join(context.directory, 'store.db')
+    store = runHis(['--summary-store', summary_store] + context.dumpfiles)
+    link = runHis(['--summary-store', summary_store, '--link'])
+    return HisOutput(link.stdout, store.stderr + link.stderr)
+
+
+# Checks by name. Each check returns output expected to be the same
+# as the output of the serial run or None if it's skipped.
+CHECKS = {
+    'baseline-new'      : checkBaselineNew,
+    'baseline-unchanged': checkBaselineUnchanged,
+    'cache'             : checkCache,
+    'driver'            : checkDriver,
+    'jobs'              : checkJobs,
+    'map-reduce'        : checkMapReduce,
+    'no-numpy'          : checkNoNumpy,
+    'profile'           : checkProfile,
+    'save-baseline'     : checkSaveBaseline,
+    'server'            : checkServer,
+    'summary-store'     : checkSummaryStore,
+    'summary-store-link': checkSummaryStoreLink,
+    'watch'             : checkWatch
+}
+
+
+# Dump files and working directory shared by checks
+class CheckContext():
+    def __init__(self, args, directory, dumpfiles, serial):
+        self.args = args
+        self.directory = directory
+        self.dumpfiles = dumpfiles
+        self.serial = serial
+
+
+# Print differences of output of check and expected output.
+# Returns True if there are none.
+def compareOutput(name, expected, output):
+    same = True
+    for stream in ['stdout', 'stderr']:
+        if getattr(output, stream) is None:
+            continue
+        diff = list(difflib.unified_diff(getattr(expected, stream), getattr(output, stream),
+                                         'expected ' + stream, name + ' ' + stream, lineterm=''))
+        if diff:
+            same = False
+            sys.stdout.write('\n'.join(diff) + '\n')
+    return same
+
+
+# Generate dump files sharing header functions in directory
+def generateDumpFiles(args, directory):
+    dumpfiles = list()
+    for idx in range(args.dumpfiles):
+        dump_args = argparse.Namespace(**vars(args))
+        dump_args.dumpfile = os.path.join(directory, 'file%d.c.dump' % idx)
+        dump_args.seed = args.seed + idx
+        his_dumpgen.generateDumpFile(dump_args)
+        dumpfiles.append(dump_args.dumpfile)
+    return dumpfiles
+
+
+# Create parser of command line arguments
+def createArgumentParser():
+    parser = argparse.ArgumentParser(description='Compare output of HIS addon modes with a serial run')
+    parser.add_argument("check", nargs='*', help="checks to run (default: all): " + ', '.join(sorted(CHECKS)))
+    parser.add_argument("--dumpfiles", type=int, default=3, help="number of generated dump files (default: 3)")
+    his_dumpgen.addGeneratorArguments(parser)
+    # Functions with too many parameters are reported, header functions
+    # are reported once
+    parser.set_defaults(functions=50, header_functions=5, params=6)
+    return parser
+
+
+# Main entry function
+def main():
+    parser = createArgumentParser()
+    args = parser.parse_args()
+    checks = args.check or sorted(CHECKS)
+    for name in checks:
+        if name not in CHECKS:
+            parser.error("unknown check: %s" % name)
+    directory = tempfile.mkdtemp(prefix='his_regress_')
+    failed = list()
+    try:
+        dumpfiles = generateDumpFiles(args, directory)
+        context = CheckContext(args, directory, dumpfiles, runHis(dumpfiles))
+        for name in checks:
+            output = CHECKS[name](context)
+            if output is None:
+                sys.stdout.write('%s: skipped\n' % name)
+            elif compareOutput(name, output.expected or context.serial, output):
+                sys.stdout.write('%s: ok\n' % name)
+            else:
+                sys.stdout.write('%s: FAILED\n' % name)
+                failed.append(name)
+    finally:
+        shutil.rmtree(directory)
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+#
+# HIS: Stub of Cppcheck writing synthetic dump files
+#
+# Stands in for the Cppcheck binary called by the driver mode of his.py
+# (--compile-commands, --source-dir). Writes a dump file generated by
+# his_dumpgen.py for each source file instead of parsing it. Cppcheck
+# options other than the generator arguments are ignored.
+#
+# Example usage (check sources of compilation database)
+# python his.py --compile-commands compile_commands.json --cppcheck "python his_stubdump.py --functions 500"
+#
+
+import argparse
+import copy
+import zlib
+
+import his_dumpgen
+
+
+# Create parser of command line arguments
+def createArgumentParser():
+    parser = argparse.ArgumentParser(description='Write synthetic dump files of source files like cppcheck --dump')
+    parser.add_argument("sourcefile", nargs='*', help="source file to write dump file of")
+    parser.add_argument("--dump", help="write dump file (always enabled)", action="store_true")
+    his_dumpgen.addGeneratorArguments(parser)
+    return parser
+
+
+# Main entry function
+def main():
+    args, cppcheck_options = createArgumentParser().parse_known_args()
+    for source_file in args.sourcefile:
+        # Each source file gets its own call graph
+        dump_args = copy.copy(args)
+        dump_args.dumpfile = source_file + '.dump'
+        dump_args.seed = args.seed + zlib.crc32(source_file.encode())
+        his_dumpgen.generateDumpFile(dump_args)
+
+if __name__ == '__main__':
+    main()
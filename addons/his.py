@@ -12,6 +12,46 @@ import cppcheckdata
 import sys
 import re
 import json
+import multiprocessing
+import sqlite3
+import hashlib
+import os
+import time
+import copy
+import difflib
+import gzip
+import lzma
+import socketserver
+import stat
+import threading
+import subprocess
+import shlex
+import collections
+import importlib
+import types
+from xml.etree import ElementTree
+
+# NumPy is optional. Token arrays are used to count tokens
+# of function bodies if it is installed. It's imported by
+# importOptional() when token arrays are used, since importing
+# it takes longer than checking a small dump file.
+numpy = None
+
+# MISRA checker of Cppcheck addons (misra.py) is optional. It's required
+# to check HIS-NOMV and HIS-NOMVPR and imported by importOptional() if
+# option --misra is given.
+misra = None
+
+# Zstandard is optional. Dump files compressed by zstd can be read if
+# module compression.zstd (Python 3.14) or zstandard is installed.
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
 # Formatted printf like function usable by Python 2.7.x and 3.x code.
@@ -19,15 +59,1737 @@ def printf(format, *args):
     sys.stdout.write(format % args)
 
 
+# Import optional module as global of this module when it's needed.
+# Returns False if it isn't installed.
+def importOptional(name):
+    if globals().get(name) is None:
+        try:
+            globals()[name] = importlib.import_module(name)
+        except ImportError:
+            return False
+    return True
+
+
+# Extensions of compressed dump files
+compressed_dump_extensions = ('.gz', '.xz', '.zst')
+
+
+# Open dump file for reading binary data. Compressed dump files are
+# decompressed while they are read.
+def openDumpFile(filename):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rb')
+    if filename.endswith('.xz'):
+        return lzma.open(filename, 'rb')
+    if filename.endswith('.zst'):
+        if zstd is not None:
+            return zstd.open(filename, 'rb')
+        if zstandard is not None:
+            return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+        raise ImportError("Reading %s requires module zstandard" % filename)
+    return open(filename, 'rb')
+
+
+# Name of dump file without extension of compression. Compressed
+# and uncompressed dump file of a source file are duplicates.
+def uncompressedDumpName(filename):
+    if filename.endswith(compressed_dump_extensions):
+        return os.path.splitext(filename)[0]
+    return filename
+
+
+# Reader of opened dump file remembering data read last
+class HisDumpReader:
+    def __init__(self, dump):
+        self.dump = dump
+        self.last = b''
+
+    def read(self, size=-1):
+        self.last = self.dump.read(size)
+        return self.last
+
+
+# Dump file data restricted to first configuration.
+# Configurations are parsed incrementally and parsing stops as soon as the
+# first configuration has been read. Raw tokens and suppressions are parsed
+# by continuing the scan of the dump file for their start tags, which skips
+# all other configurations without building their XML tree. Compressed dump
+# files are decompressed while parsing, so the first configuration and the
+# raw tokens are decompressed once.
+class HisDumpData(cppcheckdata.CppcheckData):
+    # Size of chunks read from dump file
+    chunk_size = 1024 * 1024
+    # Elements following configurations
+    tail_tags = ('rawtokens', 'suppressions')
+
+    def __init__(self, filename):
+        self.language = None
+        self.filename = filename
+        self.rawTokens = []
+        self.platform = None
+        self.suppressions = []
+        self.files = []
+        self.first_configuration = None
+
+        # Parse general configuration options from <dumps> node
+        with openDumpFile(self.filename) as dump:
+            for event, node in ElementTree.iterparse(dump, events=('start',)):
+                if node.tag == 'dumps':
+                    self.language = node.get('language')
+                elif node.tag == 'platform':
+                    self.platform = cppcheckdata.Platform(node)
+                    break
+                elif node.tag == 'dump':
+                    break
+
+        # Raw tokens and suppressions follow the configurations, their scan
+        # starts at the data read last by the configuration parser. Dump
+        # files placing them in front of the configurations are scanned
+        # again from their start.
+        with openDumpFile(self.filename) as dump:
+            reader = HisDumpReader(dump)
+            self.parseFirstConfiguration(reader)
+            found = self.parseDumpTail(reader, reader.last)
+        if not found:
+            with openDumpFile(self.filename) as dump:
+                self.parseDumpTail(dump, b'')
+
+        cppcheckdata.current_dumpfile_suppressions = self.suppressions
+
+        # Set links between rawTokens.
+        for i in range(len(self.rawTokens)-1):
+            self.rawTokens[i+1].previous = self.rawTokens[i]
+            self.rawTokens[i].next = self.rawTokens[i+1]
+
+    # Parse first configuration from opened dump file, since it might be
+    # compressed
+    def parseFirstConfiguration(self, dump):
+        filename = self.filename
+        self.filename = dump
+        try:
+            # Dump file is passed to parser by first step
+            configurations = cppcheckdata.CppcheckData.iterconfigurations(self)
+            self.first_configuration = next(configurations, None)
+            configurations.close()
+        finally:
+            self.filename = filename
+
+    # Parse raw tokens and suppressions from opened dump file starting
+    # with given data. Returns False if none of them is found.
+    def parseDumpTail(self, dump, data):
+        data = self.findDumpElement(dump, self.tail_tags, data)
+        if data is None:
+            return False
+        for tag, node in self.iterDumpElements(dump, self.tail_tags, data):
+            if tag == 'rawtokens':
+                if node.tag == 'file':
+                    self.files.append(node.get('name'))
+                elif node.tag == 'tok':
+                    tok = cppcheckdata.Token(node)
+                    tok.file = self.files[int(node.get('fileIndex'))]
+                    self.rawTokens.append(tok)
+            elif node.tag == 'suppression':
+                self.suppressions.append(cppcheckdata.Suppression(node))
+            node.clear()
+        return True
+
+    # Iterate first configuration only. The first configuration is parsed
+    # once, e.g. for HIS and MISRA checks.
+    def iterconfigurations(self):
+        if self.first_configuration is not None:
+            yield self.first_configuration
+
+    # Find start tag of first element of given tags in dump file and
+    # return data read from start tag on or None if no element is found.
+    # The scan starts with given data followed by data read from dump file.
+    def findDumpElement(self, dump, tags, data=b''):
+        start_tags = [('<' + tag).encode() for tag in tags]
+        overlap = max(len(start_tag) for start_tag in start_tags)
+        chunk = b''
+        if not data:
+            data = dump.read(self.chunk_size)
+        while data:
+            chunk = chunk[-overlap:] + data
+            found = None
+            for start_tag in start_tags:
+                pos = chunk.find(start_tag)
+                # Make sure start tag isn't just the prefix of another tag
+                while pos >= 0 and pos + len(start_tag) < len(chunk):
+                    if chunk[pos + len(start_tag):pos + len(start_tag) + 1] in b'>/ \t\r\n':
+                        break
+                    pos = chunk.find(start_tag, pos + 1)
+                if 0 <= pos and pos + len(start_tag) < len(chunk) and (found is None or pos < found):
+                    found = pos
+            if found is not None:
+                return chunk[found:]
+            data = dump.read(self.chunk_size)
+        return None
+
+    # Iterate child elements of dump file elements with given tags as
+    # (tag, node) starting with data returned by findDumpElement. The
+    # elements are read by a single scan, which stops when all of them
+    # have been read.
+    def iterDumpElements(self, dump, tags, data):
+        remaining = set(tags)
+        parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        parser.feed(b'<dumps>')
+        element = None
+        depth = 0
+        while data:
+            parser.feed(data)
+            for event, node in parser.read_events():
+                if event == 'start':
+                    depth += 1
+                    if depth == 2:
+                        element = node.tag
+                    continue
+                depth -= 1
+                if depth == 1:
+                    # Element of dump file has been read
+                    remaining.discard(node.tag)
+                    node.clear()
+                    if not remaining:
+                        return
+                elif depth > 1 and element in remaining:
+                    yield element, node
+                elif depth > 1:
+                    node.clear()
+            data = dump.read(self.chunk_size)
+
+
+# Parse dump file. Use incremental parser restricted to the first
+# configuration if supported by cppcheckdata.py . Otherwise compressed
+# dump files are passed to cppcheckdata.py as opened file.
+def parseDumpFile(filename):
+    if hasattr(cppcheckdata.CppcheckData, 'iterconfigurations') and hasattr(ElementTree, 'XMLPullParser'):
+        return HisDumpData(filename)
+    if filename.endswith(compressed_dump_extensions):
+        with openDumpFile(filename) as dump:
+            return cppcheckdata.parsedump(dump)
+    return cppcheckdata.parsedump(filename)
+
+
+# Location of a token which can be passed to another process
+class HisTokenLocation():
+    __slots__ = ('file', 'linenr', 'column')
+
+    def __init__(self, file, linenr, column):
+        self.file = file
+        self.linenr = linenr
+        self.column = column
+
+
+# Function defined in dump file which can be passed to another process.
+# Unlike cppcheckdata function objects it doesn't refer to token list
+# and scopes, so the parsed dump file can be freed once it's checked.
+class HisFunctionRecord():
+    __slots__ = ('name', 'tokenDef', 'metrics', 'fingerprint', 'called_funcs')
+
+    def __init__(self, name, tokenDef, metrics=None, fingerprint=None, called_funcs=None):
+        self.name = name
+        self.tokenDef = tokenDef
+        # Dictionary to store metric values of function body
+        # referenced by metric name
+        self.metrics = metrics if metrics is not None else dict()
+        # Fingerprint of function definition. Functions defined in headers
+        # have the same fingerprint in all dump files including them.
+        self.fingerprint = fingerprint
+        # Sorted list of functions called by function body (HIS-CALLING)
+        self.called_funcs = called_funcs if called_funcs is not None else list()
+
+    # Create record of cppcheckdata function object
+    @staticmethod
+    def fromFunction(func):
+        return HisFunctionRecord(func.name, HisTokenLocation(func.tokenDef.file, func.tokenDef.linenr, func.tokenDef.column))
+
+    # Create record of JSON representation
+    @staticmethod
+    def fromJson(values):
+        # Values are missing in records of older summary stores
+        metrics = values[4] if len(values) > 4 else None
+        fingerprint = values[5] if len(values) > 5 else None
+        called_funcs = values[6] if len(values) > 6 else None
+        return HisFunctionRecord(values[0], HisTokenLocation(values[1], values[2], values[3]), metrics, fingerprint, called_funcs)
+
+    # JSON representation of record
+    def toJson(self):
+        return [self.name, self.tokenDef.file, self.tokenDef.linenr, self.tokenDef.column, self.metrics,
+                self.fingerprint, self.called_funcs]
+
+
+# Operators and operands counted for HIS-VOCF. Tallies are multisets of
+# token strings, which are merged by adding their counts, e.g. tallies of
+# functions, dump files and worker processes.
+class HisVocfTally():
+    def __init__(self):
+        self.operators = collections.Counter()
+        self.operands = collections.Counter()
+
+    @staticmethod
+    def fromJson(values):
+        tally = HisVocfTally()
+        tally.operators.update(values['operators'])
+        tally.operands.update(values['operands'])
+        return tally
+
+    def toJson(self):
+        return {'operators': dict(self.operators), 'operands': dict(self.operands)}
+
+    # Count token string as operator or operand
+    def addToken(self, token_string, is_operator):
+        if is_operator:
+            self.operators[token_string] += 1
+        else:
+            self.operands[token_string] += 1
+
+    # Add counts of other tally
+    def update(self, other):
+        self.operators.update(other.operators)
+        self.operands.update(other.operands)
+
+    # Remove counts of other tally added before. Token strings
+    # which aren't counted anymore are removed.
+    def subtract(self, other):
+        self.operators.subtract(other.operators)
+        self.operands.subtract(other.operands)
+        self.operators = +self.operators
+        self.operands = +self.operands
+
+    # Number of operators and operands
+    def numTokens(self):
+        return sum(self.operators.values()) + sum(self.operands.values())
+
+    # Vocabulary frequency: operators and operands per distinct
+    # operator and operand. None if no token has been counted.
+    def vocf(self):
+        num_distinct = len(self.operators) + len(self.operands)
+        if num_distinct == 0:
+            return None
+        return self.numTokens() // num_distinct
+
+
+# Runner of MISRA checker of Cppcheck addons (misra.py) using dump file
+# data parsed by HIS addon, so that dump files are parsed once for both
+# checks. Violations are recorded in memory instead of being printed.
+# Summaries of cross translation unit rules are dropped.
+# The MISRA checker uses a copy of module cppcheckdata replacing dump
+# file parsing and reporting while checking, cppcheckdata itself isn't
+# modified.
+class HisMisraRunner():
+    def __init__(self, args):
+        importOptional('misra')
+        settings = misra.MisraSettings(argparse.Namespace(verify=False, cli=False, quiet=True,
+                                                          no_summary=True, severity=None))
+        self.checker = misra.MisraChecker(settings)
+        self.cppcheckdata = types.ModuleType(cppcheckdata.__name__)
+        self.cppcheckdata.__dict__.update(cppcheckdata.__dict__)
+        self.cppcheckdata.reportError = self.reportError
+        self.cppcheckdata.reportSummary = self.reportSummary
+        if args.misra_rule_texts:
+            self.checker.loadRuleTexts(args.misra_rule_texts)
+        # Rules of MISRA HIS subset. All rules if not given.
+        self.rules = None
+        if args.misra_rules:
+            self.rules = set(args.misra_rules.split(','))
+        # List of [location, rule] of violations of dump file checked
+        self.violations = list()
+
+    # Record violation reported by MISRA checker if rule
+    # is part of MISRA HIS subset, e.g. errorId "c2012-15.5"
+    def reportError(self, location, severity, message, addon, errorId, extra='', columnOverride=None):
+        rule = errorId.split('-')[-1]
+        if self.rules is None or rule in self.rules:
+            self.violations.append([location, rule])
+
+    # Drop summary of cross translation unit rules
+    def reportSummary(self, dumpfile, summary_type, summary_data):
+        pass
+
+    # Run MISRA checker using parsed data of dump file
+    # and return list of [location, rule] of violations
+    def check(self, dumpfile, data):
+        def parsedump(filename):
+            return data
+        self.violations = list()
+        # Violations are counted per dump file, even if a dump file is
+        # checked again, e.g. by watch mode
+        if hasattr(self.checker, 'existing_violations'):
+            self.checker.existing_violations = set()
+            self.checker.violations = dict()
+        self.cppcheckdata.parsedump = parsedump
+        misra.cppcheckdata = self.cppcheckdata
+        try:
+            self.checker.parseDump(dumpfile)
+        finally:
+            misra.cppcheckdata = cppcheckdata
+            self.cppcheckdata.parsedump = None
+        return self.violations
+
+    # Hash of MISRA checker and rule texts, since HIS-NOMV and
+    # HIS-NOMVPR depend on them
+    @staticmethod
+    def digest(args):
+        importOptional('misra')
+        misra_hash = hashlib.sha256()
+        for filename in [misra.__file__, args.misra_rule_texts]:
+            if filename:
+                with open(filename, 'rb') as source:
+                    misra_hash.update(source.read())
+        return misra_hash.hexdigest()
+
+
+# Output stream recording written text. Used to replay output
+# of dump file checks run by worker processes in order.
+# Text is tagged with the fingerprint of the function reported
+# by checker if checker is given.
+class HisOutputRecorder():
+    def __init__(self, stream_name, records, checker=None):
+        self.stream_name = stream_name
+        self.records = records
+        self.checker = checker
+
+    def write(self, text):
+        fingerprint = self.checker.report_fingerprint if self.checker is not None else None
+        self.records.append((self.stream_name, text, fingerprint))
+
+    def flush(self):
+        pass
+
+
+# Reporter writing diagnostic lines to an output stream in chunks.
+# Diagnostics are buffered and written at once when the buffer is
+# full or flushed, e.g. before other output is printed. Error messages
+# of JSON output are serialized to lines when they are written.
+class HisStreamReporter():
+    # Number of diagnostic lines buffered before they are written
+    buffer_size = 4096
+
+    def __init__(self, stream_name, json_lines=False):
+        self.stream_name = stream_name
+        self.json_lines = json_lines
+        self.lines = list()
+
+    # Stream diagnostics are written to. Looked up when writing,
+    # since streams might be replaced while checking.
+    def stream(self):
+        return getattr(sys, self.stream_name)
+
+    def write(self, line):
+        self.lines.append(line)
+        if len(self.lines) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            if self.json_lines:
+                self.stream().write(''.join(json.dumps(message) + '\n' for message in self.lines))
+            else:
+                self.stream().write(''.join(self.lines))
+            self.lines = list()
+
+    def close(self):
+        self.flush()
+
+
+# Reporter writing diagnostic lines to a file in chunks
+class HisFileReporter(HisStreamReporter):
+    def __init__(self, filename, json_lines=False):
+        HisStreamReporter.__init__(self, None, json_lines)
+        self.file = open(filename, 'w')
+
+    def stream(self):
+        return self.file
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+# Reporter collecting error messages of JSON output to write them as
+# SARIF log when closed, e.g. for code scanning dashboards
+class HisSarifReporter():
+    # Version and schema of SARIF log
+    version = '2.1.0'
+    schema = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+    # SARIF level of Cppcheck severity. Other severities are notes.
+    levels = {
+        'error'  : 'error',
+        'warning': 'warning'
+    }
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.rules = list()
+        self.rule_index = dict()
+        self.results = list()
+
+    def write(self, message):
+        rule_id = message['addon'] + '-' + message['errorId']
+        if rule_id not in self.rule_index:
+            self.rule_index[rule_id] = len(self.rules)
+            self.rules.append({'id': rule_id})
+        result = {
+            'ruleId'   : rule_id,
+            'ruleIndex': self.rule_index[rule_id],
+            'level'    : self.levels.get(message['severity'], 'note'),
+            'message'  : {'text': message['message']}
+        }
+        # Violations across all files have no location
+        if message['linenr'] > 0:
+            region = {'startLine': message['linenr']}
+            if message['column'] > 0:
+                region['startColumn'] = message['column']
+            result['locations'] = [{
+                'physicalLocation': {
+                    'artifactLocation': {'uri': message['file'].replace('\\', '/')},
+                    'region'          : region
+                }
+            }]
+        self.results.append(result)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        log = {
+            '$schema': self.schema,
+            'version': self.version,
+            'runs'   : [{
+                'tool'   : {'driver': {'name': 'HIS', 'rules': self.rules}},
+                'results': self.results
+            }]
+        }
+        if self.filename:
+            with open(self.filename, 'w') as sarif_file:
+                json.dump(log, sarif_file, indent=2)
+        else:
+            # Progress and summary are written to stderr in that case
+            sys.__stdout__.write(json.dumps(log, indent=2) + '\n')
+
+
+# Name of stream diagnostics are written to if no output file is given.
+# Diagnostics of output formats jsonl and sarif are written to the original
+# stdout, since progress and summary are written to stderr in that case.
+def diagnosticStreamName(args):
+    if args.cli:
+        return 'stdout'
+    if args.output_format != 'text':
+        return '__stdout__'
+    return 'stderr'
+
+
+# Check whether diagnostics are error messages of JSON instead of text lines
+def jsonDiagnostics(args):
+    return args.cli or args.output_format != 'text'
+
+
+# Check whether diagnostics are written to stdout as JSON or SARIF
+def structuredStdout(args):
+    return args.output_format != 'text' and not args.output_file and not args.cli
+
+
+# Create reporter of diagnostics according to command line options
+def createReporter(args):
+    if args.output_format == 'sarif':
+        return HisSarifReporter(args.output_file)
+    if args.output_file:
+        return HisFileReporter(args.output_file, jsonDiagnostics(args))
+    return HisStreamReporter(diagnosticStreamName(args), jsonDiagnostics(args))
+
+
+# Profile of HIS metric checks. Records wall time, tokens visited
+# and functions processed per dump file and metric.
+class HisProfile():
+    # Dump file name of results across dump files
+    all_files = 'All files'
+
+    def __init__(self):
+        # Dump file currently checked
+        self.dumpfile = self.all_files
+        # Tokens visited and functions processed by metric
+        # within current configuration
+        self.counters = dict()
+        # Dictionary of (dump file, metric) to [time, tokens, functions]
+        self.records = dict()
+
+    # Add time and counters to record of dump file and metric
+    def add(self, dumpfile, metric_name, seconds, tokens, functions):
+        record = self.records.setdefault((dumpfile, metric_name), [0.0, 0, 0])
+        record[0] += seconds
+        record[1] += tokens
+        record[2] += functions
+
+    # Call metric function and add its time and counters to profile
+    def measure(self, metric_name, metric_function, *func_args):
+        start_time = time.perf_counter()
+        try:
+            return metric_function(*func_args)
+        finally:
+            tokens, functions = self.counters.get(metric_name, (0, 0))
+            self.add(self.dumpfile, metric_name, time.perf_counter() - start_time, tokens, functions)
+
+    # Remove records and return their JSON representation
+    def takeRecords(self):
+        records = self.toJson()
+        self.records = dict()
+        return records
+
+    # Merge JSON representation of records
+    def merge(self, records):
+        for record in records:
+            self.add(record['dumpfile'], record['metric'], record['time'], record['tokens'], record['functions'])
+
+    # JSON representation of records sorted by descending time
+    def toJson(self):
+        records = list()
+        for (dumpfile, metric_name), (seconds, tokens, functions) in self.records.items():
+            records.append({'dumpfile': dumpfile, 'metric': metric_name, 'time': seconds,
+                            'tokens': tokens, 'functions': functions})
+        records.sort(key=lambda record: -record['time'])
+        return records
+
+    # Print records as table sorted by descending time
+    def printTable(self):
+        printf("%s %s %12s %10s %10s\n", "Dump file".ljust(40), "Metric".ljust(8), "Time [ms]", "Tokens", "Functions")
+        for record in self.toJson():
+            printf("%s %s %12.3f %10d %10d\n", record['dumpfile'].ljust(40), record['metric'].ljust(8),
+                   record['time'] * 1000.0, record['tokens'], record['functions'])
+
+
+# Convert given keys of dump file summary to JSON serializable dictionary
+def summaryToJson(summary, keys):
+    values = dict()
+    for key in keys:
+        values[key] = summary[key]
+        # Sets are stored as sorted lists
+        if isinstance(values[key], set):
+            values[key] = sorted(values[key])
+    if 'function_list' in values:
+        values['function_list'] = [func.toJson() for func in values['function_list']]
+    if 'vocf_tally' in values:
+        values['vocf_tally'] = values['vocf_tally'].toJson()
+    return values
+
+
+# Convert JSON representation to dump file summary.
+# Missing keys are set to empty results.
+def summaryFromJson(values):
+    summary = {
+        'source_file'            : None,
+        'output'                 : list(),
+        'statistics_list'        : list(),
+        'statistics_fingerprints': list(),
+        'verify_expected'        : set(),
+        'verify_actual'          : set(),
+        'function_fingerprints'  : list(),
+        'function_stats'         : dict(),
+        'baseline_functions'     : list(),
+        'baseline_files'         : list(),
+        'vocf_tally'             : {'operators': dict(), 'operands': dict()}
+    }
+    summary.update(values)
+    for key in ['verify_expected', 'verify_actual']:
+        summary[key] = set(summary[key])
+    summary['function_list'] = [HisFunctionRecord.fromJson(func) for func in summary['function_list']]
+    summary['vocf_tally'] = HisVocfTally.fromJson(summary['vocf_tally'])
+    return summary
+
+
+# Persistent store of dump file summaries required to calculate metrics
+# across dump files (HIS-CALLING, HIS-NRECUR, HIS-VOCF). Used if addon is
+# called by Cppcheck for each dump file separately.
+class HisSummaryStore():
+    # Keys of dump file summary which are stored
+    summary_keys = [
+        'his_stats',
+        'function_calls',
+        'function_list',
+        'functions_called',
+        'vocf_tally',
+        'function_fingerprints',
+        'function_stats',
+        'baseline_functions',
+        'baseline_files'
+    ]
+
+    def __init__(self, filename):
+        # Wait for other addon instances writing to the store
+        self.connection = sqlite3.connect(filename, timeout=60)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS dump_summary '
+                                    '(source_file TEXT PRIMARY KEY, summary TEXT)')
+
+    # Store summary of dump file. It replaces summary of
+    # previous check of the same source file.
+    def write(self, summary):
+        values = summaryToJson(summary, self.summary_keys)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO dump_summary VALUES (?, ?)',
+                                    (summary['source_file'], json.dumps(values)))
+
+    # Iterate summaries of all stored dump files ordered by source file
+    def read(self):
+        for row in self.connection.execute('SELECT summary FROM dump_summary ORDER BY source_file'):
+            yield summaryFromJson(json.loads(row[0]))
+
+    def close(self):
+        self.connection.close()
+
+
+# Cache of dump file summaries. Summaries are stored under a hash of the
+# dump file content and of all settings having an effect on the results.
+# Least recently used summaries are removed if cache exceeds its size.
+class HisResultCache():
+    # Keys of dump file summary which are cached
+    summary_keys = [
+        'source_file',
+        'output',
+        'statistics_list',
+        'statistics_fingerprints',
+        'verify_expected',
+        'verify_actual'
+    ] + HisSummaryStore.summary_keys
+
+    def __init__(self, directory, max_size, settings):
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        # Results depend on addon version as well
+        settings_hash = hashlib.sha256()
+        with open(os.path.abspath(__file__), 'rb') as addon:
+            settings_hash.update(addon.read())
+        settings_hash.update(json.dumps(settings, sort_keys=True).encode())
+        self.settings_digest = settings_hash.digest()
+
+    # Get cache key of dump file
+    def key(self, dumpfile):
+        key_hash = hashlib.sha256(self.settings_digest)
+        # Dump file name is part of the output
+        key_hash.update(dumpfile.encode())
+        with open(dumpfile, 'rb') as dump:
+            for chunk in iter(lambda: dump.read(1024 * 1024), b''):
+                key_hash.update(chunk)
+        return key_hash.hexdigest()
+
+    # Path of cache entry
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    # Get cached summary or None if dump file hasn't been cached
+    def read(self, key):
+        try:
+            with open(self.path(key), 'r') as entry:
+                summary = summaryFromJson(json.load(entry))
+        except (IOError, OSError, ValueError):
+            return None
+        # Mark entry as recently used
+        os.utime(self.path(key), None)
+        return summary
+
+    # Store summary of dump file
+    def write(self, key, summary):
+        temp_path = self.path(key) + '.%d.tmp' % os.getpid()
+        with open(temp_path, 'w') as entry:
+            json.dump(summaryToJson(summary, self.summary_keys), entry)
+        os.replace(temp_path, self.path(key))
+
+    # Remove least recently used entries exceeding cache size
+    def evict(self):
+        entries = list()
+        cache_size = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            status = os.stat(path)
+            entries.append((status.st_mtime, path, status.st_size))
+            cache_size += status.st_size
+        entries.sort()
+        for mtime, path, size in entries:
+            if cache_size <= self.max_size:
+                break
+            os.remove(path)
+            cache_size -= size
+
+
+# Partial result of a shard of dump files written by map mode and merged by
+# reduce mode, e.g. on different machines. The file consists of lines of JSON,
+# a header followed by the summary of each dump file, so partial results are
+# merged one dump file at a time. Files ending with .gz are compressed.
+class HisPartialResult():
+    # Format name and version of partial result files
+    format_name = 'his-partial'
+    version = 2
+
+    # Keys of dump file summary which are written
+    summary_keys = HisResultCache.summary_keys + ['profile']
+
+    def __init__(self, filename, settings):
+        self.filename = filename
+        # Partial results have to be created with the same settings
+        self.settings_digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+    # Open partial result file
+    def openFile(self, filename, mode):
+        if self.filename.endswith('.gz'):
+            return gzip.open(filename, mode + 't')
+        return open(filename, mode)
+
+    # Write summaries of dump files
+    def write(self, summaries):
+        temp_path = self.filename + '.%d.tmp' % os.getpid()
+        with self.openFile(temp_path, 'w') as partial:
+            header = {'format': self.format_name, 'version': self.version, 'settings': self.settings_digest}
+            partial.write(json.dumps(header) + '\n')
+            for summary in summaries:
+                partial.write(json.dumps(summaryToJson(summary, self.summary_keys), separators=(',', ':')) + '\n')
+        os.replace(temp_path, self.filename)
+
+    # Iterate summaries of dump files
+    def read(self):
+        with self.openFile(self.filename, 'r') as partial:
+            header = json.loads(partial.readline() or 'null')
+            if not isinstance(header, dict) or header.get('format') != self.format_name:
+                raise ValueError("%s is not a partial result" % self.filename)
+            if header.get('version') != self.version:
+                raise ValueError("Unsupported partial result version of %s" % self.filename)
+            if header.get('settings') != self.settings_digest:
+                raise ValueError("Partial result %s has been created with different settings" % self.filename)
+            for line in partial:
+                yield summaryFromJson(json.loads(line))
+
+
+# Snapshot of the function definitions of a run used as baseline of a later
+# run (HIS-SNEW, HIS-SCHG, HIS-SDEL). Functions are referenced by file and
+# name. Each function stores a hash of its body tokens, a hash of each of its
+# statements, its metric values and called functions. Line numbers aren't
+# part of the hashes, so functions moved within a file are unchanged.
+class HisBaseline():
+    # Version of snapshot file format
+    version = 1
+
+    def __init__(self, functions=None):
+        # Dictionary to store values of function referenced by key
+        self.functions = functions if functions is not None else dict()
+
+    # Load snapshot file. A missing file is an empty baseline.
+    @staticmethod
+    def load(filename):
+        if not os.path.exists(filename):
+            return HisBaseline()
+        with open(filename, 'r') as snapshot:
+            values = json.load(snapshot)
+        if values.get('version') != HisBaseline.version:
+            raise ValueError("Unsupported baseline version of %s" % filename)
+        return HisBaseline(values['functions'])
+
+    # Store snapshot file
+    def save(self, filename):
+        temp_path = filename + '.%d.tmp' % os.getpid()
+        with open(temp_path, 'w') as snapshot:
+            json.dump({'version': self.version, 'functions': self.functions}, snapshot, indent=1, sort_keys=True)
+        os.replace(temp_path, filename)
+
+    # Key of function. Functions with the same name in the
+    # same file are numbered by their order.
+    @staticmethod
+    def functionKey(file, name, occurrence):
+        if occurrence > 1:
+            return '%s:%s#%d' % (file, name, occurrence)
+        return '%s:%s' % (file, name)
+
+    # Count new, changed and deleted statements
+    # of function by its statement hashes
+    @staticmethod
+    def statementChanges(old_statements, new_statements):
+        num_new = 0
+        num_changed = 0
+        num_deleted = 0
+        matcher = difflib.SequenceMatcher(None, old_statements, new_statements, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == 'replace':
+                changed = min(old_end - old_start, new_end - new_start)
+                num_changed += changed
+                num_deleted += old_end - old_start - changed
+                num_new += new_end - new_start - changed
+            elif tag == 'delete':
+                num_deleted += old_end - old_start
+            elif tag == 'insert':
+                num_new += new_end - new_start
+        return [num_new, num_changed, num_deleted]
+
+
+# Producer of dump files running Cppcheck for source files. At most jobs
+# Cppcheck processes run at once. Dump files are yielded in order of source
+# files as soon as they have been written, while the next ones are still
+# being produced.
+class HisDumpProducer():
+    # Extensions of source files searched in source directories
+    source_extensions = ('.c', '.cc', '.cpp', '.cxx', '.c++')
+
+    # Preprocessor options of compile commands passed on to Cppcheck.
+    # Value is the Cppcheck option or None if it's the same.
+    preprocessor_options = {
+        '-I'      : None,
+        '-D'      : None,
+        '-U'      : None,
+        '-isystem': '-I',
+        '-include': '--include='
+    }
+
+    def __init__(self, command, jobs):
+        self.command = shlex.split(command)
+        self.jobs = max(jobs, 1)
+        # Source files Cppcheck failed to write dump files of
+        self.failed = list()
+
+    # Sources of compilation database as [directory, file, options] lists
+    @staticmethod
+    def compileCommands(filename):
+        with open(filename) as database:
+            entries = json.load(database)
+        sources = list()
+        for entry in entries:
+            if 'arguments' in entry:
+                arguments = entry['arguments']
+            else:
+                arguments = shlex.split(entry.get('command', ''))
+            directory = entry.get('directory', os.path.dirname(os.path.abspath(filename)))
+            source = os.path.normpath(os.path.join(directory, entry['file']))
+            sources.append([directory, source, HisDumpProducer.cppcheckOptions(arguments[1:])])
+        return sources
+
+    # Cppcheck options of preprocessor options of compiler arguments
+    @staticmethod
+    def cppcheckOptions(arguments):
+        options = list()
+        idx = 0
+        while idx < len(arguments):
+            argument = arguments[idx]
+            for option, cppcheck_option in HisDumpProducer.preprocessor_options.items():
+                if argument == option and idx + 1 < len(arguments):
+                    value = arguments[idx + 1]
+                    idx += 1
+                elif argument.startswith(option) and len(option) == 2 and len(argument) > 2:
+                    value = argument[2:]
+                else:
+                    continue
+                if cppcheck_option is None:
+                    options.append(option + value)
+                else:
+                    options.append(cppcheck_option + value)
+                break
+            idx += 1
+        return options
+
+    # Sources of source directory as [directory, file, options] lists
+    @staticmethod
+    def sourceDirectory(dirname):
+        sources = list()
+        for root, dirs, files in os.walk(dirname):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(HisDumpProducer.source_extensions):
+                    sources.append([root, os.path.abspath(os.path.join(root, name)), list()])
+        return sources
+
+    # Start Cppcheck writing dump file of source
+    def start(self, source):
+        directory, source_file, options = source
+        process = subprocess.Popen(self.command + ['--dump', '--quiet'] + options + [source_file],
+                                   cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return process, source_file
+
+    # Wait for Cppcheck and return dump file or None if it failed
+    def finish(self, job):
+        process, source_file = job
+        dumpfile = source_file + '.dump'
+        if process.wait() != 0 or not os.path.isfile(dumpfile):
+            sys.stderr.write("Failed to write dump file %s (exit code %d)\n" % (dumpfile, process.returncode))
+            self.failed.append(source_file)
+            return None
+        return dumpfile
+
+    # Iterate dump files of sources in order of sources.
+    # Sources are distinct by file, the first one is kept.
+    def dumpfiles(self, sources):
+        unique_sources = collections.OrderedDict()
+        for source in sources:
+            unique_sources.setdefault(source[1], source)
+        running = collections.deque()
+        try:
+            for source in unique_sources.values():
+                if len(running) >= self.jobs:
+                    dumpfile = self.finish(running.popleft())
+                    if dumpfile is not None:
+                        yield dumpfile
+                running.append(self.start(source))
+            while running:
+                dumpfile = self.finish(running.popleft())
+                if dumpfile is not None:
+                    yield dumpfile
+        finally:
+            # Stop Cppcheck processes left if checks are aborted
+            for process, source_file in running:
+                process.kill()
+                process.wait()
+
+
+# HIS metric checker of worker process
+his_worker_checker = None
+
+
+# Create HIS metric checker used to check single dump files
+def createDumpFileChecker(args):
+    stdout = sys.stdout
+    # Upper limit modifications have already been printed by main checker
+    sys.stdout = HisOutputRecorder('stdout', list())
+    try:
+        return HisMetricChecker(args)
+    finally:
+        sys.stdout = stdout
+
+
+# Setup HIS metric checker of worker process
+def initDumpFileWorker(args):
+    global his_worker_checker
+    his_worker_checker = createDumpFileChecker(args)
+
+
+# Run metric checks of dump file by worker process
+def checkDumpFileWorker(dumpfile):
+    return his_worker_checker.dump_file_summary(dumpfile, True)
+
+
+# Run metric checks of dump file written by Cppcheck by worker process
+def checkProducedDumpFileWorker(dumpfile):
+    return his_worker_checker.produced_dump_file_summary(dumpfile, True)
+
+
+# Analysis session of server mode. Keeps results of all dump files
+# checked so far, so that metrics across dump files are answered for
+# the whole project after each update of a single dump file.
+class HisSession():
+    def __init__(self, args):
+        # Checker of single dump files. Summaries are complete since
+        # analyzed functions aren't skipped by server mode.
+        self.file_checker = createDumpFileChecker(args)
+        # Checker of metrics across dump files
+        self.project_checker = createDumpFileChecker(args)
+        self.results = HisMergedResults(self.project_checker)
+
+    # Check dump file and metrics across all dump files of session
+    def check(self, dumpfile):
+        self.file_checker.diagnostics = list()
+        try:
+            summary = self.file_checker.dump_file_summary(dumpfile, True)
+            diagnostics = self.file_checker.diagnostics
+        finally:
+            self.file_checker.diagnostics = None
+        # Keep values required by metrics across dump files only
+        summary = summaryFromJson(summaryToJson(summary, HisSummaryStore.summary_keys))
+        return {
+            'dumpfile'           : dumpfile,
+            'diagnostics'        : diagnostics,
+            'project_diagnostics': self.check_project(dumpfile, summary)
+        }
+
+    # Remove dump file from session and check metrics across remaining dump files
+    def remove(self, dumpfile):
+        return {
+            'dumpfile'           : dumpfile,
+            'diagnostics'        : list(),
+            'project_diagnostics': self.check_project(dumpfile, None)
+        }
+
+    # Replace results of dump file by results of summary, or remove them
+    # if summary is None, and check metrics across all dump files of session
+    def check_project(self, dumpfile, summary):
+        checker = self.project_checker
+        checker.statistics_list = list()
+        stdout = sys.stdout
+        sys.stdout = HisOutputRecorder('stdout', list())
+        try:
+            if summary is not None:
+                self.results.update(dumpfile, summary)
+            elif dumpfile in self.results.summaries:
+                self.results.remove(dumpfile)
+            checker.diagnostics = list()
+            checker.rerun_cross_file_checks()
+            return checker.diagnostics
+        finally:
+            checker.diagnostics = None
+            sys.stdout = stdout
+
+
+# Results across dump files updated per dump file. Results of a dump file
+# checked again are retracted and replaced by its new results, without
+# merging the results of unchanged dump files again. Used by watch mode
+# and by sessions of server mode.
+class HisMergedResults():
+    def __init__(self, checker):
+        # Checker of metrics across dump files
+        self.checker = checker
+        # Dictionary to store summary of dump file referenced by dump file name
+        self.summaries = collections.OrderedDict()
+        # Number of dump files containing function definition referenced by fingerprint
+        self.fingerprint_files = collections.Counter()
+        # Dictionary to store list of dump files defining function referenced by name,
+        # in order of dump files
+        self.function_files = dict()
+
+    # Replace results of dump file by results of summary
+    def update(self, dumpfile, summary):
+        if dumpfile in self.summaries:
+            self.retract(dumpfile)
+        self.summaries[dumpfile] = summary
+        self.merge(dumpfile)
+
+    # Remove results of dump file
+    def remove(self, dumpfile):
+        self.retract(dumpfile)
+        del self.summaries[dumpfile]
+
+    # Merge results of dump file with results across dump files
+    def merge(self, dumpfile):
+        summary = self.summaries[dumpfile]
+        checker = self.checker
+        checker.merge_dump_file_summary(summary)
+        self.fingerprint_files.update(summary['function_fingerprints'])
+        positions = None
+        for func_name in summary['functions_called']:
+            dumpfiles = self.function_files.setdefault(func_name, list())
+            dumpfiles.append(dumpfile)
+            if len(dumpfiles) == 1:
+                continue
+            # Functions of the same name defined by other dump files are
+            # taken from the last dump file like by a single run, not from
+            # the dump file changed last
+            if positions is None:
+                positions = dict((name, position) for position, name in enumerate(self.summaries))
+            dumpfiles.sort(key=positions.get)
+            if dumpfiles[-1] != dumpfile:
+                checker.functions_called[func_name] = self.summaries[dumpfiles[-1]]['functions_called'][func_name]
+
+    # Retract results of dump file from results across dump files
+    def retract(self, dumpfile):
+        summary = self.summaries[dumpfile]
+        checker = self.checker
+        self.fingerprint_files.subtract(summary['function_fingerprints'])
+        shared = any(self.fingerprint_files[fingerprint] > 0 for fingerprint in summary['function_fingerprints'])
+        for fingerprint in summary['function_fingerprints']:
+            if self.fingerprint_files[fingerprint] <= 0:
+                del self.fingerprint_files[fingerprint]
+        for func_name in summary['functions_called']:
+            self.function_files[func_name].remove(dumpfile)
+
+        if shared:
+            # Results of function definitions shared with other dump files,
+            # e.g. functions defined in headers, have been merged from the
+            # first dump file only. Merge results of other dump files again.
+            self.remerge(dumpfile)
+            return
+
+        for key in checker.his_stats:
+            if not checker.isMetricSuppressed(key):
+                checker.his_stats[key] -= summary['his_stats'][key]
+        for called_func, num_calls in summary['function_calls'].items():
+            checker.function_calls[called_func] -= num_calls
+            if checker.function_calls[called_func] == 0:
+                del checker.function_calls[called_func]
+        retracted_functions = set(id(func) for func in summary['function_list'])
+        checker.function_list = [func for func in checker.function_list if id(func) not in retracted_functions]
+        checker.merged_functions.difference_update(summary['function_fingerprints'])
+        # Functions of the same name defined by other dump files are
+        # taken from the last dump file
+        for func_name in summary['functions_called']:
+            if self.function_files[func_name]:
+                other_dumpfile = self.function_files[func_name][-1]
+                checker.functions_called[func_name] = self.summaries[other_dumpfile]['functions_called'][func_name]
+            else:
+                del self.function_files[func_name]
+                del checker.functions_called[func_name]
+        checker.vocf_tally.subtract(summary['vocf_tally'])
+
+    # Merge results of all dump files except the retracted one again
+    # without printing their output
+    def remerge(self, retracted_dumpfile):
+        checker = self.checker
+        statistics_list = checker.statistics_list
+        reporter = checker.reporter
+        stdout = sys.stdout
+        stderr = sys.stderr
+        checker.statistics_list = list()
+        checker.reporter = HisOutputRecorder('report', list())
+        sys.stdout = HisOutputRecorder('stdout', list())
+        sys.stderr = HisOutputRecorder('stderr', list())
+        try:
+            checker.reset_cross_file_state()
+            self.fingerprint_files.clear()
+            self.function_files = dict()
+            for dumpfile in self.summaries:
+                if dumpfile != retracted_dumpfile:
+                    self.merge(dumpfile)
+        finally:
+            checker.statistics_list = statistics_list
+            checker.reporter = reporter
+            sys.stdout = stdout
+            sys.stderr = stderr
+
+
+# Watch mode checking dump files again as soon as they have been changed.
+# Dump files are polled by modification time and size. Results of a changed
+# dump file are retracted from the results across dump files and replaced
+# by its new results, without checking unchanged dump files again.
+class HisWatch():
+    def __init__(self, args):
+        self.args = args
+        # Checker of single dump files. Summaries have to be complete since
+        # dump files are checked again in any order.
+        self.file_checker = createDumpFileChecker(args)
+        self.file_checker.skip_analyzed_functions = False
+        # Checker of metrics across dump files
+        self.checker = HisMetricChecker(args)
+        self.results = HisMergedResults(self.checker)
+        # Modification time and size of dump files when checked and polled
+        self.checked_states = dict()
+        self.polled_states = dict()
+
+    # Poll dump files until interrupted
+    def run(self):
+        try:
+            while True:
+                self.update()
+                time.sleep(self.args.watch_interval)
+        except KeyboardInterrupt:
+            pass
+
+    # Modification time and size of dump files referenced by dump file name.
+    # Directories are searched for dump files.
+    def dumpFileStates(self):
+        states = collections.OrderedDict()
+        for path in self.args.dumpfile:
+            if os.path.isdir(path):
+                dumpfiles = list()
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    dumpfiles += [os.path.join(root, name) for name in sorted(files)
+                                  if uncompressedDumpName(name).endswith('.dump')]
+            else:
+                dumpfiles = [path]
+            for dumpfile in dumpfiles:
+                try:
+                    file_stat = os.stat(dumpfile)
+                except OSError:
+                    continue
+                states[dumpfile] = (file_stat.st_mtime_ns, file_stat.st_size)
+        return states
+
+    # Check dump files changed since last poll and print updated results
+    def update(self):
+        states = self.dumpFileStates()
+        changed = list()
+        for dumpfile, state in states.items():
+            if state == self.checked_states.get(dumpfile):
+                continue
+            # Dump file is checked as soon as it isn't written anymore
+            if self.checked_states and state != self.polled_states.get(dumpfile):
+                continue
+            changed.append(dumpfile)
+        removed = [dumpfile for dumpfile in self.results.summaries if dumpfile not in states]
+        self.polled_states = states
+        if not changed and not removed:
+            return
+
+        checker = self.checker
+        checker.statistics_list = list()
+        checker.reporter = createReporter(self.args)
+        try:
+            for dumpfile in removed:
+                self.results.remove(dumpfile)
+                self.checked_states.pop(dumpfile, None)
+            for dumpfile in changed:
+                # Dump files failed to check are checked again when changed
+                self.checked_states[dumpfile] = states[dumpfile]
+                try:
+                    summary = self.file_checker.dump_file_summary(dumpfile, True)
+                except Exception as e:
+                    sys.stderr.write("Failed to check %s: %s\n" % (dumpfile, e))
+                    continue
+                self.results.update(dumpfile, summary)
+            checker.reporter.flush()
+            if not self.args.quiet:
+                printf("Checking metrics for all dump files...\n")
+            checker.rerun_cross_file_checks()
+        finally:
+            checker.reporter.close()
+        checker.print_summary()
+        sys.stdout.flush()
+
+
+# Server answering analysis requests received by Unix domain socket.
+# Each request is a line of JSON, e.g.
+#     {"command": "check", "dumpfile": "main.c.dump", "options": ["--suppress-metrics=GOTO"]}
+# Commands are "check" (default), "remove" and "shutdown". Each distinct
+# list of options gets its own session. Requests without options use the
+# options of the server command line. The response is a line of JSON.
+# Connections are served by threads of their own, requests are answered
+# one after another.
+class HisServer():
+    # Maximum number of sessions of request options. Least recently used
+    # sessions are removed first. The session of the server command line
+    # options is kept.
+    max_option_sessions = 8
+
+    def __init__(self, args):
+        self.args = copy.copy(args)
+        self.args.quiet = True
+        # Dictionary to store session referenced by options of requests
+        # in order of their last use
+        self.sessions = collections.OrderedDict()
+        # Sessions are shared by all connections
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    # Get session of options. Options None are server command line options.
+    def session(self, options):
+        key = tuple(options) if options is not None else None
+        if key in self.sessions:
+            self.sessions.move_to_end(key)
+            return self.sessions[key]
+        if options is None:
+            args = self.args
+        else:
+            args = parseArguments(list(options) + ['--quiet'])
+            args.server = self.args.server
+            option_sessions = [other_key for other_key in self.sessions if other_key is not None]
+            if len(option_sessions) >= self.max_option_sessions:
+                del self.sessions[option_sessions[0]]
+        self.sessions[key] = HisSession(args)
+        return self.sessions[key]
+
+    # Answer request
+    def handle(self, request):
+        command = request.get('command', 'check')
+        if command == 'shutdown':
+            self.stopped = True
+            return {'status': 'shutdown'}
+        if command not in ['check', 'remove']:
+            return {'error': 'Unknown command: %s' % command}
+        if 'dumpfile' not in request:
+            return {'error': 'Missing dump file'}
+        options = request.get('options')
+        if options is not None:
+            if not isinstance(options, list) or not all(isinstance(option, str) for option in options):
+                return {'error': 'Options must be a list of strings'}
+        dumpfile = os.path.abspath(request['dumpfile'])
+        try:
+            with self.lock:
+                session = self.session(options)
+                if command == 'remove':
+                    return session.remove(dumpfile)
+                return session.check(dumpfile)
+        except SystemExit:
+            # Invalid options reported by argument parser
+            return {'error': 'Invalid options: %s' % json.dumps(options)}
+        except Exception as e:
+            return {'error': '%s: %s' % (type(e).__name__, e)}
+
+    # Serve requests until shutdown is requested
+    def serve(self, path):
+        # Remove socket left over by previous server
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        server = HisUnixStreamServer(path, HisRequestHandler)
+        server.his_server = self
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.unlink(path)
+
+
+# Unix domain socket server serving each connection by a thread of its
+# own, so that a connection kept open (e.g. by an IDE) doesn't block
+# other clients. Open connections are closed at shutdown.
+class HisUnixStreamServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    block_on_close = False
+
+
+# Handler of connection to server. Answers requests until
+# the connection is closed by client or shutdown is requested.
+class HisRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode('utf-8'))
+                if not isinstance(request, dict):
+                    raise ValueError('request is no JSON object')
+            except ValueError as e:
+                response = {'error': 'Invalid request: %s' % e}
+            else:
+                response = self.server.his_server.handle(request)
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+            if self.server.his_server.stopped:
+                # Stop serve_forever() of main thread
+                self.server.shutdown()
+                break
+
+
+# Metric values of a function body collected by the single pass
+# function body visitor of HIS metric checker.
+class HisFunctionBody():
+    def __init__(self, func, scope):
+        self.func = func
+        self.scope = scope
+        # Record of function kept after dump file has been checked
+        self.record = HisFunctionRecord.fromFunction(func)
+        # Fingerprint of function definition and hash of its body tokens
+        self.fingerprint = None
+        self.body_hash = None
+        # Key and snapshot of function compared to baseline. Unchanged
+        # functions of baseline are neither visited nor reported.
+        self.baseline_key = None
+        self.baseline_entry = None
+        self.unchanged = False
+        # HIS-PATH
+        self.num_paths = 1
+        # HIS-STCYC
+        self.num_nodes = 2
+        self.num_edges = 1
+        # HIS-CALLING, HIS-CALLS
+        self.called_funcs = set()
+        # HIS-STMT, HIS-COMF
+        self.num_statements = 0
+        self.current_line_nr = -1
+        # HIS-LEVEL
+        self.level_violations = list()
+        self.level_compound_stm = None
+        # HIS-RETURN
+        self.num_return_points = 0
+        self.return_skip_end = None
+        # HIS-VOCF
+        self.vocf_tally = HisVocfTally()
+
+
+# Index of the scopes of a configuration. It is built once per
+# configuration to look up scopes without searching all scopes.
+class HisConfigurationIndex():
+    def __init__(self, data):
+        # Dictionary to store list of function body scopes
+        # referenced by function object
+        self.function_scopes = dict()
+        # Dictionary to store list of function body scopes referenced
+        # by function name. Used by dump files of Cppcheck versions
+        # which don't provide the function attribute of a scope.
+        self.function_scopes_by_name = dict()
+        # Dictionary to store end of lambda function body
+        # referenced by lambda function object
+        self.lambda_body_end = dict()
+        # Dictionary to store end of lambda function body
+        # referenced by lambda function name
+        self.lambda_body_end_by_name = dict()
+        # Dictionary to store number of statements of all bodies
+        # of a function referenced by function object.
+        # Filled after function bodies have been visited.
+        self.function_statements = dict()
+        # Dictionaries to store fingerprint of function body referenced
+        # by function scope and of first function body referenced by
+        # function object
+        self.scope_fingerprints = dict()
+        self.function_fingerprints = dict()
+        # Functions whose bodies are all skipped plus number of statements
+        # of bodies skipped since they were analyzed before
+        self.skipped_functions = set()
+        self.skipped_statements = 0
+        # Function scopes not reported, since they were analyzed before
+        # or they are unchanged compared to baseline
+        self.skipped_scopes = set()
+        # Dictionaries to store innermost function scope of a scope
+        # and nesting depth of scope relative to that function scope
+        # referenced by scope
+        self.scope_function = dict()
+        self.scope_depth = dict()
+        # Dictionary to store innermost switch scope of a scope
+        # referenced by scope
+        self.scope_switch = dict()
+        # List of switch scopes. Enclosing switch scopes precede nested ones.
+        self.switch_scopes = list()
+        # Dictionary to store number of case labels of switch statement
+        # including case labels of nested switch statements referenced
+        # by open curly bracket of switch body. Filled on demand.
+        self.switch_cases = None
+
+        for scope in data.scopes:
+            if scope.type == "Function":
+                if hasattr(scope, 'function'):
+                    if scope.function is not None:
+                        self.function_scopes.setdefault(scope.function, list()).append(scope)
+                else:
+                    self.function_scopes_by_name.setdefault(scope.className, list()).append(scope)
+            elif scope.type == "Lambda":
+                # First matching lambda scope is used
+                if hasattr(scope, 'function'):
+                    if scope.function is not None:
+                        self.lambda_body_end.setdefault(scope.function, scope.bodyEnd)
+                else:
+                    self.lambda_body_end_by_name.setdefault(scope.className, scope.bodyEnd)
+
+        for scope in data.scopes:
+            self.annotateScope(scope)
+
+    # Annotate scope and enclosing scopes not annotated so far
+    # with innermost function scope, depth and innermost switch scope
+    def annotateScope(self, scope):
+        scope_chain = list()
+        while scope is not None and scope not in self.scope_depth:
+            scope_chain.append(scope)
+            scope = scope.nestedIn
+        # Enclosing scopes are annotated first
+        for scope in reversed(scope_chain):
+            parent = scope.nestedIn
+            if scope.type == "Function":
+                self.scope_function[scope] = scope
+                self.scope_depth[scope] = 0
+            elif parent is None:
+                self.scope_function[scope] = None
+                self.scope_depth[scope] = 0
+            else:
+                self.scope_function[scope] = self.scope_function[parent]
+                self.scope_depth[scope] = self.scope_depth[parent] + 1
+            if scope.type == "Switch":
+                self.scope_switch[scope] = scope
+                self.switch_scopes.append(scope)
+            else:
+                self.scope_switch[scope] = self.scope_switch.get(parent)
+
+    # Get list of function body scopes matching the function object
+    def functionScopes(self, func):
+        # All scopes of a dump file either provide the function
+        # attribute or not. Thus only one of the dictionaries is used.
+        if func in self.function_scopes:
+            return self.function_scopes[func]
+        return self.function_scopes_by_name.get(func.name, list())
+
+    # Get end of lambda function body matching the function object.
+    # Returns None if there is no lambda scope for function object.
+    def lambdaBodyEnd(self, func):
+        if func in self.lambda_body_end:
+            return self.lambda_body_end[func]
+        return self.lambda_body_end_by_name.get(func.name)
+
+    # Store values of visited function bodies per function
+    def addFunctionBodies(self, func_bodies):
+        for func_body in func_bodies:
+            self.function_statements[func_body.func] = self.function_statements.get(func_body.func, 0) + func_body.num_statements
+
+    # Get number of statements of all bodies of function object
+    def functionStatements(self, func):
+        return self.function_statements.get(func, 0)
+
+    # Get number of statements of all functions including skipped ones
+    def totalStatements(self):
+        return sum(self.function_statements.values()) + self.skipped_statements
+
+    # Get fingerprint of function body enclosing scope.
+    # Returns None if scope isn't part of a function body.
+    def bodyFingerprint(self, scope):
+        return self.scope_fingerprints.get(self.scope_function.get(scope))
+
+    # Get nesting depth of scope relative to function scope.
+    # Returns None if function scope isn't the innermost
+    # function scope of scope.
+    def functionDepth(self, scope, function_scope):
+        if function_scope is not None and self.scope_function.get(scope) is function_scope:
+            return self.scope_depth[scope]
+        return None
+
+    # Get number of case labels of switch statement including case labels
+    # of nested switch statements by open curly bracket of switch body.
+    # Returns None if token isn't start of a switch body.
+    def switchCases(self, body_start):
+        if self.switch_cases is None:
+            self.countSwitchCases(body_start)
+        return self.switch_cases.get(body_start)
+
+    # Count case labels of all switch statements with one walk through
+    # token list. Case labels of nested switch statements are added to
+    # enclosing switch statements.
+    def countSwitchCases(self, token):
+        num_cases = dict()
+        for switch_scope in self.switch_scopes:
+            num_cases[switch_scope] = 0
+        # Walk back to start of token list
+        while token.previous is not None:
+            token = token.previous
+        while token is not None:
+            if token.str == "case":
+                switch_scope = self.scope_switch.get(token.scope)
+                if switch_scope is not None:
+                    num_cases[switch_scope] += 1
+            token = token.next
+        self.switch_cases = dict()
+        # Nested switch scopes are counted before enclosing ones
+        for switch_scope in reversed(self.switch_scopes):
+            enclosing_switch = self.scope_switch.get(switch_scope.nestedIn)
+            if enclosing_switch is not None:
+                num_cases[enclosing_switch] += num_cases[switch_scope]
+            self.switch_cases[switch_scope.bodyStart] = num_cases[switch_scope]
+
+
+# Token list of a configuration converted to integer arrays. Each token
+# string is interned as token kind code. Tokens of a function body are
+# counted by vectorized operations over the slice of its body tokens
+# instead of following token.next pointers. Requires NumPy.
+class HisTokenArrays():
+    def __init__(self, data, cfg_index, is_function_call):
+        self.tokens = data.tokenlist
+        # Token kind code referenced by token string and vice versa
+        self.kind_codes = dict()
+        self.kind_strings = list()
+        # Dictionary to store masks of token kinds referenced by name
+        self.kind_masks = dict()
+        # Positions of curly brackets referenced by token
+        self.bracket_positions = dict()
+
+        has_lambdas = False
+        for scope in data.scopes:
+            if scope.type == "Lambda":
+                has_lambdas = True
+                break
+
+        kind_codes = self.kind_codes
+        kind_strings = self.kind_strings
+        bracket_positions = self.bracket_positions
+        kinds = list()
+        lines = list()
+        call_positions = list()
+        lambda_positions = list()
+        for position, token in enumerate(self.tokens):
+            code = kind_codes.get(token.str)
+            if code is None:
+                code = len(kind_strings)
+                kind_codes[token.str] = code
+                kind_strings.append(token.str)
+            kinds.append(code)
+            lines.append(token.linenr)
+            if token.isName:
+                if is_function_call(token):
+                    call_positions.append(position)
+            elif token.str == "{" or token.str == "}":
+                bracket_positions[token] = position
+            # Tokens of lambda functions and tokens referring to them
+            if has_lambdas:
+                if token.scope is not None and token.scope.type == "Lambda":
+                    lambda_positions.append(position)
+                elif token.function is not None and cfg_index.lambdaBodyEnd(token.function) is not None:
+                    lambda_positions.append(position)
+
+        # Token kind code, line number, function call and lambda
+        # function flag of each token of token list
+        self.kinds = numpy.array(kinds, dtype=numpy.int32)
+        self.lines = numpy.array(lines, dtype=numpy.int64)
+        self.calls = numpy.zeros(len(kinds), dtype=bool)
+        self.calls[call_positions] = True
+        self.lambdas = numpy.zeros(len(kinds), dtype=bool)
+        self.lambdas[lambda_positions] = True
+        # Masks of tokens counted as operators and operands of HIS-VOCF.
+        # Set on demand by metric checker.
+        self.vocf_masks = None
+
+    # Get range of positions of body tokens of scope excluding
+    # its curly brackets. Returns None if body isn't part of token list.
+    def bodyRange(self, scope):
+        start = self.bracket_positions.get(scope.bodyStart)
+        end = self.bracket_positions.get(scope.bodyEnd)
+        if start is None or end is None or start >= end:
+            return None
+        return (start + 1, end)
+
+    # Get mask of token kind codes whose token string is part of set
+    def kindMask(self, name, strings):
+        if name not in self.kind_masks:
+            mask = numpy.zeros(len(self.kind_strings), dtype=bool)
+            for code, kind_string in enumerate(self.kind_strings):
+                if kind_string in strings:
+                    mask[code] = True
+            self.kind_masks[name] = mask
+        return self.kind_masks[name]
+
+    # Count tokens of each token kind within range of positions
+    def kindCounts(self, start, end):
+        return numpy.bincount(self.kinds[start:end], minlength=len(self.kind_strings))
+
+    # Get number of tokens of token string from token kind counts
+    def kindCount(self, kind_counts, token_string):
+        code = self.kind_codes.get(token_string)
+        if code is None:
+            return 0
+        return int(kind_counts[code])
+
+    # Get tokens within range of positions whose kind is part of mask
+    def tokensOfKind(self, mask, start, end):
+        positions = numpy.flatnonzero(mask[self.kinds[start:end]])
+        return [self.tokens[start + position] for position in positions.tolist()]
+
+    # Get token strings of kind mask within range of positions and
+    # number of tokens of these kinds
+    def kindStrings(self, mask, start, end):
+        kinds = self.kinds[start:end][mask[start:end]]
+        codes = numpy.flatnonzero(numpy.bincount(kinds, minlength=len(self.kind_strings))).tolist()
+        return [self.kind_strings[code] for code in codes], len(kinds)
+
+    # Count tokens of each token string within range of positions
+    # whose position is part of token mask
+    def kindStringCounts(self, token_mask, start, end):
+        kinds = self.kinds[start:end][token_mask[start:end]]
+        counts = numpy.bincount(kinds, minlength=len(self.kind_strings))
+        return collections.Counter(dict((self.kind_strings[code], int(counts[code]))
+                                        for code in numpy.flatnonzero(counts).tolist()))
+
+    # Get names of functions called within range of positions
+    def calledFunctions(self, start, end):
+        return set(self.kindStrings(self.calls, start, end)[0])
+
+    # Is any token within range of positions part of a lambda function
+    def hasLambdas(self, start, end):
+        return bool(self.lambdas[start:end].any())
+
+    # Count line changes of tokens within range of positions. Lines with
+    # just an opening or closing curly bracket or semicolon are ignored.
+    def numOfLines(self, start, end, current_line_nr):
+        bracket_mask = self.kind_masks.get("brackets")
+        if bracket_mask is None:
+            brackets = [kind_string for kind_string in self.kind_strings if kind_string.startswith(("{", "}", ";"))]
+            bracket_mask = self.kindMask("brackets", brackets)
+        lines = self.lines[start:end]
+        ignored = bracket_mask[self.kinds[start:end]]
+        ignored &= lines != self.lines[start - 1:end - 1]
+        ignored &= lines != self.lines[start + 1:end + 1]
+        lines = lines[~ignored]
+        if len(lines) == 0:
+            return 0
+        num_lines = int(numpy.count_nonzero(lines[1:] != lines[:-1]))
+        if lines[0] != current_line_nr:
+            num_lines += 1
+        return num_lines
+
+
 # HIS metric checker class
 class HisMetricChecker():
-    # List to store location of expected rule/metric violations.
+    # Set to store location of expected rule/metric violations.
     # Used for script verification
-    verify_expected = []
+    verify_expected = set()
 
-    # List to store location of actual rule/metric violations.
+    # Set to store location of actual rule/metric violations.
     # Used for script verification
-    verify_actual = []
+    verify_actual = set()
 
     # C/C++ keywords
     keywords = {
@@ -117,6 +1879,28 @@ class HisMetricChecker():
         ';'
     }
 
+    # Control statement keywords opening a compound statement
+    compound_statement_keywords = {
+        'if',
+        'switch',
+        'for',
+        'while',
+        'do'
+    }
+
+    # Increment of number of nodes and edges per keyword
+    # used to calculate cyclomatic complexity (HIS-STCYC)
+    stcyc_increments = {
+        'for'    : (3, 4),
+        'while'  : (3, 4),
+        'do'     : (3, 4),
+        'if'     : (3, 4),
+        'else'   : (1, 1),
+        'switch' : (2, 1),
+        'case'   : (1, 2),
+        'default': (1, 2)
+    }
+
     # Dictionary to store HIS metric violation statistics counter.
     # If a metric is suppressed this will be stored instead of
     # counter value.
@@ -147,7 +1931,9 @@ class HisMetricChecker():
         'PARAM'  : 5,
         'STMT'   : 50,
         'LEVEL'  : 4,
-        'RETURN' : 1
+        'RETURN' : 1,
+        'NOMV'   : 0,
+        'NOMVPR' : 0
     }    
 
     # command line arguments
@@ -170,22 +1956,155 @@ class HisMetricChecker():
     # function referenced by key
     functions_called = dict()
 
-    # list of distinct operators
-    distinct_operator_list = list()
+    # Operators and operands of dump file(s) counted for HIS-VOCF
+    vocf_tally = None
+
+    # Scope index and values per function of configuration currently
+    # checked. Released as soon as checks of a dump file are done.
+    cfg_index = None
+
+    # Token arrays of configuration currently checked if NumPy is
+    # installed. Released together with scope index.
+    token_arrays = None
+
+    # Use token arrays to count tokens of function bodies
+    use_token_arrays = False
+
+    # Minimum number of tokens of a configuration to use token arrays.
+    # Tokens of shorter token lists are counted faster than NumPy is imported.
+    token_arrays_min_tokens = 20000
+
+    # Number of raw tokens of dump files already checked.
+    # Used for Cppcheck versions before 2.4 storing raw tokens at class level.
+    num_raw_tokens = 0
+
+    # Dictionary to dispatch function body tokens by token string
+    # to keyword handlers of metrics which are not suppressed.
+    keyword_dispatch = dict()
+
+    # Profile of metric checks if requested by command line
+    profile = None
+
+    # List to collect reported errors as JSON serializable messages
+    # instead of printing them. Used by server mode.
+    diagnostics = None
+
+    # Reporter writing diagnostics. Output of dump file checks is
+    # recorded by replacing it, e.g. by worker processes.
+    reporter = None
+
+    # Function formatting a diagnostic of reporter, a text line or an
+    # error message of JSON output
+    formatDiagnostic = None
+
+    # Function of cppcheckdata checking inline suppressions of dump
+    # file. Cppcheck checks suppressions itself if addon is called by it.
+    is_suppressed = None
+
+    # Skip function definitions already analyzed by this checker, e.g.
+    # functions defined in headers included by several dump files.
+    # Disabled if summaries are stored, since a stored summary has to be
+    # complete regardless of the dump files checked before.
+    skip_analyzed_functions = True
+
+    # Hash function bodies to get fingerprints of function definitions.
+    # Fingerprints are required to detect function definitions checked
+    # before and to compare function definitions to baseline, but not to
+    # check a single dump file.
+    use_fingerprints = True
+
+    # Dictionary to store number of statements of function definitions
+    # analyzed by this checker referenced by fingerprint
+    analyzed_functions = dict()
+
+    # Dictionary to store number of statements of function definitions
+    # analyzed in current dump file. Added to analyzed functions after
+    # dump file has been checked.
+    dump_file_functions = dict()
+
+    # Fingerprint of function definition currently reported. Used to tag
+    # output and statistics to remove duplicates while merging results.
+    report_fingerprint = None
+
+    # List of fingerprints of function definitions analyzed in dump file
+    function_fingerprints = list()
+
+    # List of [index, fingerprint] pairs tagging statistics list entries
+    # of function definitions of dump file
+    statistics_fingerprints = list()
 
-    # sum of operators
-    sum_of_operators = 0
+    # Dictionary to store number of violations per metric of function
+    # definition referenced by fingerprint
+    function_stats = dict()
 
-    # list of distinct operands
-    distinct_operand_list = list()
+    # Set of fingerprints of function definitions merged so far
+    merged_functions = set()
 
-    # sum of operands
-    sum_of_operands = 0
+    # Metrics checked across all dump files
+    cross_file_metrics = ['CALLING', 'VOCF', 'NRECUR']
+
+    # Metrics checked by MISRA checker if requested by command line
+    misra_metrics = ['NOMV', 'NOMVPR']
+
+    # Runner of MISRA checker. Created on demand.
+    misra_runner = None
+
+    # Dictionary to store number of violations of metrics checked
+    # across all dump files found by their last run
+    cross_file_stats = dict()
+
+    # Snapshot of previous run compared to if requested by command line
+    baseline = None
+
+    # List of [key, snapshot, fingerprint, changes] of function definitions
+    # checked. Changes are the numbers of new, changed and deleted statements.
+    baseline_functions = list()
+
+    # Set of files of dump files checked. Functions of baseline which are
+    # part of these files but haven't been found are deleted.
+    baseline_files = set()
+
+    # List of source files Cppcheck failed to write dump files of
+    # (--compile-commands, --source-dir)
+    failed_sources = list()
+
+    # Dictionary to store number of new, changed and deleted statements
+    # compared to baseline (HIS-SNEW, HIS-SCHG, HIS-SDEL)
+    baseline_stats = None
 
     # Constructor of His metric checker
     def __init__(self, args):
         self.args = args
 
+        # Class level attributes are defaults. Each checker gets its own
+        # state, so that several checkers can be used by one process.
+        self.verify_expected = set()
+        self.verify_actual = set()
+        self.his_stats = dict(self.his_stats)
+        self.his_metric_upper_limit = dict(self.his_metric_upper_limit)
+        self.suppression_list = list()
+        self.statistics_list = list()
+        self.statistics_fingerprints = list()
+        self.analyzed_functions = dict()
+        self.skip_analyzed_functions = not (args.cache_dir or args.summary_store or args.server)
+        self.use_fingerprints = len(args.dumpfile) != 1 or args.jobs > 1 or bool(
+            args.cache_dir or args.summary_store or args.server or args.watch or args.map or
+            args.baseline or args.save_baseline or args.compile_commands or args.source_dir)
+        self.use_token_arrays = not args.no_numpy
+        # Format of diagnostics is chosen once instead of per diagnostic
+        self.reporter = HisStreamReporter(diagnosticStreamName(args), jsonDiagnostics(args))
+        if jsonDiagnostics(args):
+            self.formatDiagnostic = self.errorMessage
+        else:
+            self.formatDiagnostic = self.textDiagnostic
+        if not args.cli:
+            self.is_suppressed = getattr(cppcheckdata, 'is_suppressed', None)
+        if args.baseline:
+            self.baseline = HisBaseline.load(args.baseline)
+        if args.misra:
+            for key in self.misra_metrics:
+                self.his_stats[key] = 0
+
         # Setup metric suppression list
         if args.suppress_metrics:
             self.suppression_list = args.suppress_metrics.split(',')
@@ -202,6 +2121,18 @@ class HisMetricChecker():
                         self.his_metric_upper_limit[metric[0]] = int(metric[1])
                         printf("HIS-%s upper limit set to %s\n", metric[0], metric[1])
 
+        # Setup keyword dispatch table of function body visitor
+        self.keyword_dispatch = dict()
+        self.registerKeywordHandler("PATH", ["if", "for", "do", "while", "switch"], self.visitPathKeyword)
+        self.registerKeywordHandler("STCYC", self.stcyc_increments.keys(), self.visitStcycKeyword)
+        self.registerKeywordHandler("LEVEL", self.compound_statement_keywords, self.visitLevelKeyword)
+        self.registerKeywordHandler("LEVEL", ["{"], self.visitLevelCompoundStart)
+
+        if args.profile:
+            self.profile = HisProfile()
+
+        self.reset_cross_file_state()
+
     # Object representation
     def __repr__(self):
         attrs = ["verify_expected", "verify_actual", "keywords", "his_stats",
@@ -215,65 +2146,93 @@ class HisMetricChecker():
     # Execute metric check if not suppressed
     def execute_metric_check(self, metric_name, metric_function, *func_args):
         if self.his_stats[metric_name] != "Suppressed":
-            metric_function(*func_args)
+            if self.profile is None:
+                metric_function(*func_args)
+            else:
+                self.profile.measure(metric_name, metric_function, *func_args)
+
+    # Is metric suppressed by command line
+    def isMetricSuppressed(self, metric_name):
+        return self.his_stats[metric_name] == "Suppressed"
+
+    # Register keyword handler of metric at keyword dispatch table
+    # if metric is not suppressed
+    def registerKeywordHandler(self, metric_name, keyword_list, handler):
+        if not self.isMetricSuppressed(metric_name):
+            for keyword in keyword_list:
+                self.keyword_dispatch.setdefault(keyword, list()).append(handler)
 
     # Run the HIS metric check according to command line option settings
     def run_checks(self):
-        num_raw_tokens = 0
-
-        # Remove duplicates from dump file list
-        self.args.dumpfile = list(dict.fromkeys(self.args.dumpfile))
-        # Run metric checks for each dump file
+        # Remove duplicates from dump file list. Compressed and uncompressed
+        # dump files of the same source file are duplicates.
+        dumpfiles = dict()
         for dumpfile in self.args.dumpfile:
+            dumpfiles.setdefault(uncompressedDumpName(dumpfile), dumpfile)
+        self.args.dumpfile = list(dumpfiles.values())
+        summary_store = None
+        if self.args.summary_store:
+            summary_store = HisSummaryStore(self.args.summary_store)
+        # Write partial result instead of checking metrics across dump files
+        if self.args.map:
+            HisPartialResult(self.args.map, self.result_settings()).write(self.dump_file_summaries())
+            return
+        self.reporter = createReporter(self.args)
+        try:
+            self.run_merge_checks(summary_store)
+        finally:
+            self.reporter.close()
+
+    # Merge results of dump files, check metrics across them
+    # and print summary
+    def run_merge_checks(self, summary_store):
+        if self.args.reduce:
+            summaries = self.partial_result_summaries()
+        else:
+            summaries = self.dump_file_summaries()
+        # Run metric checks for each dump file
+        for summary in summaries:
+            self.merge_dump_file_summary(summary)
+            if summary_store is not None:
+                summary_store.write(summary)
+        self.reporter.flush()
+
+        # Metrics across dump files are calculated by link step
+        # if summaries of dump files are stored.
+        if summary_store is None or self.args.link:
+            if summary_store is not None:
+                self.load_summary_store(summary_store)
             if not self.args.quiet:
-                printf("Checking %s...\n", dumpfile)
-            self.statistics_list.append(dumpfile)
-            data = cppcheckdata.parsedump(dumpfile)
-            if self.args.verify:
-                for token in data.rawTokens[num_raw_tokens:]:
-                    if token.str.startswith('//') and 'TODO' not in token.str:
-                        for word in token.str[2:].split(' '):
-                            if word.startswith("HIS-"):
-                                self.verify_expected.append(token.file + ':' + str(token.linenr) + ':' + word)
-
-            cfg_idx = 0
-            for cfg in data.configurations:
-                if (cfg_idx < 1): 
-                    self.execute_metric_check("COMF", self.his_comf, cfg, data.rawTokens[num_raw_tokens:])
-                    self.execute_metric_check("PATH", self.his_path, cfg)
-                    self.execute_metric_check("GOTO", self.his_goto, cfg)
-                    self.execute_metric_check("STCYC", self.his_stcyc, cfg)
-                    self.execute_metric_check("CALLING", self.his_calling, cfg)
-                    self.execute_metric_check("CALLS", self.his_calls, cfg)
-                    self.execute_metric_check("PARAM", self.his_param, cfg)
-                    self.execute_metric_check("STMT", self.his_stmt, cfg)
-                    self.execute_metric_check("LEVEL", self.his_level, cfg)
-                    self.execute_metric_check("RETURN", self.his_return, cfg)
-                    self.execute_metric_check("VOCF", self.his_vocf, cfg)
-                cfg_idx = cfg_idx + 1
-            # Since Cppcheck 2.4 rawTokens has been moved from class to instance level.
-            # It will be initialized for each dump file analysis.
-            if 'rawTokens' not in data.__dict__:
-                num_raw_tokens = len(data.rawTokens)
-
-        if not self.args.quiet:
-            printf("Checking metrics for all dump files...\n")
-        # Check for violations of HIS-CALLING after all dump files have been analyzed.
-        self.execute_metric_check("CALLING", self.his_calling_result)
-        # Check for violation of HIS-VOCF after all dump files have been analyzed.
-        self.execute_metric_check("VOCF", self.his_vocf_result)
-        # Check for violations of HIS-NRECUR after all dump files have been analyzed.
-        self.execute_metric_check("NRECUR", self.his_num_recursions)
+                printf("Checking metrics for all dump files...\n")
+            self.run_cross_file_checks()
+            self.reporter.flush()
+            if self.args.baseline or self.args.save_baseline:
+                self.finish_baseline()
+        if summary_store is not None:
+            summary_store.close()
 
         if self.args.verify:
-            for expected in self.verify_expected:
-                if expected not in self.verify_actual:
-                    printf("Expected but not seen: %s\n", expected)
-            for actual in self.verify_actual:
-                if actual not in self.verify_expected:
-                    printf("Not expected: %s\n", actual)
-
-        # Print summary if not suppressed by command line
+            for expected in sorted(self.verify_expected - self.verify_actual, key=self.verifyLocationKey):
+                printf("Expected but not seen: %s\n", expected)
+            for actual in sorted(self.verify_actual - self.verify_expected, key=self.verifyLocationKey):
+                printf("Not expected: %s\n", actual)
+
+        self.print_summary()
+
+        if self.profile is not None:
+            if not self.args.cli:
+                printf("\n---------------------------\n")
+                printf("--- Profile information\n")
+                printf("---------------------------\n")
+                self.profile.printTable()
+                printf("\n")
+            if self.args.profile_json:
+                with open(self.args.profile_json, 'w') as profile_file:
+                    json.dump(self.profile.toJson(), profile_file, indent=2)
+
+    # Print summary of violations and statistics information
+    # if not suppressed by command line
+    def print_summary(self):
         if not self.args.no_summary and not self.args.verify:
             printf("\n---------------------------\n")
             printf("--- Summary of violations\n")
@@ -284,6 +2243,13 @@ class HisMetricChecker():
                 else:
                     printf("HIS-%s: %d\n", key.ljust(10), self.his_stats[key])
             printf("\n")
+            if self.baseline_stats is not None:
+                printf("---------------------------\n")
+                printf("--- Statements changed since baseline\n")
+                printf("---------------------------\n")
+                for key in self.baseline_stats:
+                    printf("HIS-%s: %d\n", key.ljust(10), self.baseline_stats[key])
+                printf("\n")
 
         if self.args.statistics and not self.args.verify:
             printf("\n---------------------------\n")
@@ -293,45 +2259,886 @@ class HisMetricChecker():
                 printf("%s\n", item)
             printf("\n")
 
-    # Add error report entry
-    def reportError(self, token, severity, msg, id):
-        if token is None:
-            if self.args.cli:
-                message = { 'file': 'All files',
-                            'linenr': 0,
-                            'column': 0,
-                            'severity': severity,
-                            'message': msg,
-                            'addon': 'HIS',
-                            'errorId': id,
-                            'extra': ''}
-                sys.stdout.write(json.dumps(message) + '\n')
+    # Run the HIS metric checks across all dump files merged so far
+    # after removing violations of their previous run
+    def rerun_cross_file_checks(self):
+        for key in self.cross_file_stats:
+            self.his_stats[key] -= self.cross_file_stats[key]
+        his_stats = dict(self.his_stats)
+        self.run_cross_file_checks()
+        for key in self.cross_file_metrics:
+            if not self.isMetricSuppressed(key):
+                self.cross_file_stats[key] = self.his_stats[key] - his_stats[key]
+
+    # Run the HIS metric checks across all dump files merged so far
+    def run_cross_file_checks(self):
+        if self.profile is not None:
+            self.profile.dumpfile = HisProfile.all_files
+            self.profile.counters = {
+                'CALLING': (0, len(self.function_list)),
+                'NRECUR' : (0, len(self.functions_called))
+            }
+        # Check for violations of HIS-CALLING after all dump files have been analyzed.
+        self.execute_metric_check("CALLING", self.his_calling_result)
+        # Check for violation of HIS-VOCF after all dump files have been analyzed.
+        self.execute_metric_check("VOCF", self.his_vocf_result)
+        # Check for violations of HIS-NRECUR after all dump files have been analyzed.
+        self.execute_metric_check("NRECUR", self.his_num_recursions)
+
+    # Count statements changed since baseline including statements of
+    # deleted functions and store snapshot of functions checked
+    def finish_baseline(self):
+        functions = dict()
+        num_new = 0
+        num_changed = 0
+        num_deleted = 0
+        for key, entry, fingerprint, changes in self.baseline_functions:
+            functions[key] = entry
+            num_new += changes[0]
+            num_changed += changes[1]
+            num_deleted += changes[2]
+        if self.baseline is not None:
+            for key in sorted(self.baseline.functions):
+                entry = self.baseline.functions[key]
+                if key not in functions and entry['file'] in self.baseline_files:
+                    self.statistics_list.append("HIS-SDEL  - %s: %d" % (entry['name'].ljust(50), len(entry['statements'])))
+                    num_deleted += len(entry['statements'])
+            self.baseline_stats = {
+                'SNEW': num_new,
+                'SCHG': num_changed,
+                'SDEL': num_deleted
+            }
+        if self.args.save_baseline:
+            HisBaseline(functions).save(self.args.save_baseline)
+
+    # Sort key of verification location "file:line:metric"
+    # to sort by file, line number and metric
+    def verifyLocationKey(self, location):
+        file, linenr, metric = location.rsplit(':', 2)
+        return (file, int(linenr), metric)
+
+    # Run the HIS metric checks of a dump file and return name of source file
+    def run_dump_file_checks(self, dumpfile):
+        if not self.args.quiet:
+            printf("Checking %s...\n", dumpfile)
+        self.statistics_list.append(dumpfile)
+        # Release values of previous dump file before parsing next one
+        self.cfg_index = None
+        self.token_arrays = None
+        self.dump_file_functions = dict()
+        if self.profile is None:
+            data = parseDumpFile(dumpfile)
+            configurations = data.configurations
+        else:
+            self.profile.dumpfile = dumpfile
+            start_time = time.perf_counter()
+            data = parseDumpFile(dumpfile)
+            # Configurations might be parsed on demand
+            configurations = data.configurations
+            num_tokens = sum(len(cfg.tokenlist) for cfg in configurations)
+            self.profile.add(dumpfile, 'PARSE', time.perf_counter() - start_time, num_tokens, 0)
+        if self.args.baseline or self.args.save_baseline:
+            self.baseline_files.update(data.files)
+        if self.args.verify:
+            for token in data.rawTokens[self.num_raw_tokens:]:
+                if token.str.startswith('//') and 'TODO' not in token.str:
+                    for word in token.str[2:].split(' '):
+                        if word.startswith("HIS-"):
+                            self.verify_expected.add(token.file + ':' + str(token.linenr) + ':' + word)
+
+        cfg_idx = 0
+        for cfg in configurations:
+            if (cfg_idx < 1): 
+                self.run_configuration_checks(cfg, data.rawTokens[self.num_raw_tokens:])
+            cfg_idx = cfg_idx + 1
+        if self.args.misra:
+            self.run_misra_checks(dumpfile, data, data.rawTokens[self.num_raw_tokens:])
+        self.cfg_index = None
+        self.token_arrays = None
+        self.analyzed_functions.update(self.dump_file_functions)
+        # Since Cppcheck 2.4 rawTokens has been moved from class to instance level.
+        # It will be initialized for each dump file analysis.
+        if 'rawTokens' not in data.__dict__:
+            self.num_raw_tokens = len(data.rawTokens)
+        # Return name of checked source file
+        if getattr(data, 'files', None):
+            return data.files[0]
+        return dumpfile
+
+    # Iterate summaries of dump file checks in order of dump file list.
+    # Dump files are checked by a pool of worker processes if requested.
+    # Summaries of unchanged dump files are taken from result cache.
+    def dump_file_summaries(self):
+        if self.args.compile_commands or self.args.source_dir:
+            for summary in self.produced_dump_file_summaries():
+                yield summary
+            return
+        result_cache = None
+        cache_keys = dict()
+        cached_summaries = dict()
+        dumpfiles = self.args.dumpfile
+        if self.args.cache_dir:
+            result_cache = HisResultCache(self.args.cache_dir, self.args.cache_size * 1024 * 1024, self.result_settings())
+            for dumpfile in self.args.dumpfile:
+                cache_keys[dumpfile] = result_cache.key(dumpfile)
+                summary = result_cache.read(cache_keys[dumpfile])
+                if summary is not None:
+                    cached_summaries[dumpfile] = summary
+            dumpfiles = [dumpfile for dumpfile in self.args.dumpfile if dumpfile not in cached_summaries]
+
+        if self.args.jobs > 1 and len(dumpfiles) > 1:
+            pool = multiprocessing.Pool(self.args.jobs, initDumpFileWorker, (self.args,))
+            summaries = pool.imap(checkDumpFileWorker, dumpfiles)
+        else:
+            pool = None
+            if dumpfiles:
+                dump_file_checker = createDumpFileChecker(self.args)
+                dump_file_checker.reporter = self.reporter
+            # Output has to be recorded to be cached or written to partial result.
+            # Functions analyzed before aren't skipped if summaries are stored, so
+            # their output is recorded to be removed while merging.
+            record_output = result_cache is not None or bool(self.args.map or self.args.summary_store)
+            summaries = (dump_file_checker.dump_file_summary(dumpfile, record_output)
+                         for dumpfile in dumpfiles)
+        try:
+            for dumpfile in self.args.dumpfile:
+                if dumpfile in cached_summaries:
+                    yield cached_summaries.pop(dumpfile)
+                    continue
+                summary = next(summaries)
+                if result_cache is not None:
+                    result_cache.write(cache_keys[dumpfile], summary)
+                yield summary
+            if pool is not None:
+                pool.close()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        if result_cache is not None:
+            result_cache.evict()
+
+    # Iterate summaries of dump files written by Cppcheck for the sources
+    # of compilation database or source directory. Dump files are checked
+    # while Cppcheck writes the next ones. Results aren't cached.
+    def produced_dump_file_summaries(self):
+        if self.args.compile_commands:
+            sources = HisDumpProducer.compileCommands(self.args.compile_commands)
+        else:
+            sources = HisDumpProducer.sourceDirectory(self.args.source_dir)
+        producer = HisDumpProducer(self.args.cppcheck, self.args.dump_jobs)
+        self.failed_sources = producer.failed
+        dumpfiles = producer.dumpfiles(sources)
+        if self.args.jobs > 1:
+            pool = multiprocessing.Pool(self.args.jobs, initDumpFileWorker, (self.args,))
+            summaries = self.pooled_summaries(pool, checkProducedDumpFileWorker, dumpfiles)
+        else:
+            pool = None
+            dump_file_checker = createDumpFileChecker(self.args)
+            dump_file_checker.reporter = self.reporter
+            record_output = bool(self.args.map or self.args.summary_store)
+            summaries = (dump_file_checker.produced_dump_file_summary(dumpfile, record_output)
+                         for dumpfile in dumpfiles)
+        try:
+            for summary in summaries:
+                yield summary
+            if pool is not None:
+                pool.close()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            dumpfiles.close()
+
+    # Iterate summaries of dump files checked by pool of worker processes
+    # in order of dump files. Unlike Pool.imap, dump files are taken from
+    # the iterator only while few of them are waiting to be checked, so
+    # that Cppcheck doesn't run ahead of the checks by far.
+    def pooled_summaries(self, pool, worker, dumpfiles):
+        pending = collections.deque()
+        for dumpfile in dumpfiles:
+            if len(pending) >= 2 * self.args.jobs:
+                yield pending.popleft().get()
+            pending.append(pool.apply_async(worker, (dumpfile,)))
+        while pending:
+            yield pending.popleft().get()
+
+    # Iterate summaries of dump files of all partial results
+    # in order of partial result files
+    def partial_result_summaries(self):
+        # Settings are hashed before merging changes the statistics
+        settings = self.result_settings()
+        partial_results = [HisPartialResult(filename, settings) for filename in self.args.dumpfile]
+        for partial_result in partial_results:
+            for summary in partial_result.read():
+                yield summary
+
+    # Settings having an effect on results of dump file checks
+    def result_settings(self):
+        return {
+            'his_stats'             : self.his_stats,
+            'his_metric_upper_limit': self.his_metric_upper_limit,
+            'quiet'                 : self.args.quiet,
+            'cli'                   : self.args.cli,
+            'verify'                : self.args.verify,
+            'output_format'         : self.args.output_format,
+            'misra_rules'           : self.args.misra_rules if self.args.misra else None,
+            'misra'                 : HisMisraRunner.digest(self.args) if self.args.misra else None,
+            'baseline'              : self.baseline.functions if self.baseline is not None else None,
+            'save_baseline'         : bool(self.args.save_baseline)
+        }
+
+    # Reset state collected across dump files
+    def reset_cross_file_state(self):
+        self.function_calls = dict()
+        self.function_list = list()
+        self.functions_called = dict()
+        self.vocf_tally = HisVocfTally()
+        self.cross_file_stats = dict()
+        self.merged_functions = set()
+        self.baseline_functions = list()
+        self.baseline_files = set()
+        self.his_stats = dict(self.his_stats)
+        for key in self.his_stats:
+            if not self.isMetricSuppressed(key):
+                self.his_stats[key] = 0
+
+    # Run the HIS metric checks of a dump file and return summary of
+    # results required to merge them with results of other dump files.
+    # Output is recorded to be replayed while merging if requested.
+    def dump_file_summary(self, dumpfile, record_output):
+        self.statistics_list = list()
+        self.statistics_fingerprints = list()
+        self.verify_expected = set()
+        self.verify_actual = set()
+        self.function_fingerprints = list()
+        self.function_stats = dict()
+        self.report_fingerprint = None
+        self.reset_cross_file_state()
+
+        output = list()
+        stdout = sys.stdout
+        stderr = sys.stderr
+        reporter = self.reporter
+        if record_output:
+            sys.stdout = HisOutputRecorder('stdout', output, self)
+            sys.stderr = HisOutputRecorder('stderr', output, self)
+            self.reporter = HisOutputRecorder('report', output, self)
+        try:
+            source_file = self.run_dump_file_checks(dumpfile)
+            self.reporter.flush()
+        finally:
+            sys.stdout = stdout
+            sys.stderr = stderr
+            self.reporter = reporter
+
+        return {
+            'source_file'           : source_file,
+            'output'                : output,
+            'statistics_list'       : self.statistics_list,
+            'statistics_fingerprints': self.statistics_fingerprints,
+            'verify_expected'       : self.verify_expected,
+            'verify_actual'         : self.verify_actual,
+            'his_stats'             : self.his_stats,
+            'function_calls'        : self.function_calls,
+            'function_list'         : self.function_list,
+            'functions_called'      : self.functions_called,
+            'vocf_tally'            : self.vocf_tally,
+            'function_fingerprints' : self.function_fingerprints,
+            'function_stats'        : self.function_stats,
+            'baseline_functions'    : self.baseline_functions,
+            'baseline_files'        : sorted(self.baseline_files),
+            'profile'               : self.profile.takeRecords() if self.profile is not None else list()
+        }
+
+    # Run the HIS metric checks of a dump file written by Cppcheck and
+    # delete the dump file afterwards if requested
+    def produced_dump_file_summary(self, dumpfile, record_output):
+        try:
+            return self.dump_file_summary(dumpfile, record_output)
+        finally:
+            if self.args.delete_dumps:
+                os.remove(dumpfile)
+
+    # Replace state collected across dump files by
+    # summaries of all dump files of summary store
+    def load_summary_store(self, summary_store):
+        self.reset_cross_file_state()
+        for summary in summary_store.read():
+            self.merge_dump_file_summary(summary)
+
+    # Merge summary of dump file results
+    # Results of function definitions merged before, e.g. functions
+    # defined in headers, are removed.
+    def merge_dump_file_summary(self, summary):
+        merged_functions = self.merged_functions
+        for record in summary['output']:
+            if len(record) > 2 and record[2] in merged_functions:
+                continue
+            if record[0] == 'report':
+                self.reporter.write(record[1])
             else:
-                sys.stderr.write('[' + 'All files' + ':' + '---' +
-                             '] (' + severity + ') ' + msg + ' [HIS-' + id +
-                             ']\n')
+                self.reporter.flush()
+                getattr(sys, record[0]).write(record[1])
+        duplicate_statistics = set()
+        for index, fingerprint in summary['statistics_fingerprints']:
+            if fingerprint in merged_functions:
+                duplicate_statistics.add(index)
+        for index, item in enumerate(summary['statistics_list']):
+            if index not in duplicate_statistics:
+                self.statistics_list.append(item)
+        self.verify_expected.update(summary['verify_expected'])
+        self.verify_actual.update(summary['verify_actual'])
+        his_stats = dict(summary['his_stats'])
+        for fingerprint, function_stats in summary['function_stats'].items():
+            if fingerprint in merged_functions:
+                for key in function_stats:
+                    his_stats[key] -= function_stats[key]
+        for key in self.his_stats:
+            if not self.isMetricSuppressed(key):
+                self.his_stats[key] = self.his_stats[key] + his_stats[key]
+        for called_func in summary['function_calls']:
+            self.function_calls[called_func] = self.function_calls.get(called_func, 0) + summary['function_calls'][called_func]
+        for func in summary['function_list']:
+            if func.fingerprint is not None and func.fingerprint in merged_functions:
+                for called_func in func.called_funcs:
+                    self.function_calls[called_func] -= 1
+                    if self.function_calls[called_func] == 0:
+                        del self.function_calls[called_func]
+                continue
+            self.function_list.append(func)
+        for function in summary['baseline_functions']:
+            if function[2] not in merged_functions:
+                self.baseline_functions.append(function)
+        self.baseline_files.update(summary['baseline_files'])
+        merged_functions.update(summary['function_fingerprints'])
+        self.functions_called.update(summary['functions_called'])
+        self.vocf_tally.update(summary['vocf_tally'])
+        if self.profile is not None:
+            # Summaries taken from result cache or summary store have no profile
+            self.profile.merge(summary.get('profile', list()))
+
+    # Run the HIS metric checks of a configuration.
+    # Function bodies and token list are walked once to collect the
+    # values of all metrics which are not suppressed.
+    def run_configuration_checks(self, cfg, rawTokens):
+        if self.profile is not None:
+            start_time = time.perf_counter()
+        self.cfg_index = HisConfigurationIndex(cfg)
+        if self.use_token_arrays and len(cfg.tokenlist) >= self.token_arrays_min_tokens:
+            self.use_token_arrays = importOptional('numpy')
+            if self.use_token_arrays:
+                self.token_arrays = HisTokenArrays(cfg, self.cfg_index, self.isFunctionCall)
+        func_bodies = self.collectFunctionBodies(cfg)
+        if self.skip_analyzed_functions:
+            func_bodies = self.removeAnalyzedFunctions(func_bodies)
+        if self.args.baseline or self.args.save_baseline:
+            self.assignBaselineKeys(func_bodies)
+        # Function bodies to visit and report
+        changed_bodies = func_bodies
+        if self.baseline is not None:
+            changed_bodies = self.compareBaseline(func_bodies)
+        for func_body in changed_bodies:
+            self.visitFunctionBody(cfg, func_body)
+        self.cfg_index.addFunctionBodies(func_bodies)
+        self.recordFunctionMetrics(changed_bodies)
+        if self.use_fingerprints:
+            for func_body in func_bodies:
+                self.function_fingerprints.append(func_body.fingerprint)
+                self.dump_file_functions[func_body.fingerprint] = func_body.num_statements
+        goto_tokens = self.visitTokenList(cfg, changed_bodies)
+        if self.profile is not None:
+            self.profileConfiguration(cfg, rawTokens, func_bodies, changed_bodies, goto_tokens,
+                                      time.perf_counter() - start_time)
+
+        self.execute_metric_check("COMF", self.his_comf, rawTokens)
+        self.execute_metric_check("PATH", self.his_path, changed_bodies)
+        self.execute_metric_check("GOTO", self.his_goto, goto_tokens)
+        self.execute_metric_check("STCYC", self.his_stcyc, changed_bodies)
+        self.execute_metric_check("CALLING", self.his_calling, func_bodies)
+        self.execute_metric_check("CALLS", self.his_calls, func_bodies)
+        self.execute_metric_check("PARAM", self.his_param, changed_bodies)
+        self.execute_metric_check("STMT", self.his_stmt, cfg)
+        self.execute_metric_check("LEVEL", self.his_level, changed_bodies)
+        self.execute_metric_check("RETURN", self.his_return, changed_bodies)
+        self.execute_metric_check("VOCF", self.his_vocf, changed_bodies, rawTokens)
+        if self.args.baseline or self.args.save_baseline:
+            self.snapshotFunctions(func_bodies)
+
+    # Run MISRA checker using parsed data of dump file and check
+    # violations of MISRA HIS subset
+    def run_misra_checks(self, dumpfile, data, rawTokens):
+        if self.isMetricSuppressed("NOMV") and self.isMetricSuppressed("NOMVPR"):
+            return
+        if self.misra_runner is None:
+            self.misra_runner = HisMisraRunner(self.args)
+        if self.profile is None:
+            violations = self.misra_runner.check(dumpfile, data)
         else:
-            if self.args.verify:
-                self.verify_actual.append(token.file + ':' + str(token.linenr) + ':HIS-' + id)
+            start_time = time.perf_counter()
+            violations = self.misra_runner.check(dumpfile, data)
+            self.profile.add(dumpfile, 'MISRA', time.perf_counter() - start_time, 0, 0)
+        self.execute_metric_check("NOMV", self.his_nomv, violations, rawTokens)
+        self.execute_metric_check("NOMVPR", self.his_nomvpr, violations)
+
+    # Add time of walking through configuration to profile. Function
+    # bodies and token list are walked once for all metrics, so tokens
+    # visited are counted for the walk only. Metric checks count the
+    # tokens and functions they process themselves.
+    def profileConfiguration(self, cfg, rawTokens, func_bodies, changed_bodies, goto_tokens, seconds):
+        num_changed = len(changed_bodies)
+        self.profile.add(self.profile.dumpfile, 'VISIT', seconds, len(cfg.tokenlist), num_changed)
+        self.profile.counters = {
+            'COMF'   : (len(rawTokens), 0),
+            'PATH'   : (0, num_changed),
+            'GOTO'   : (len(goto_tokens), 0),
+            'STCYC'  : (0, num_changed),
+            'CALLING': (0, len(func_bodies)),
+            'CALLS'  : (0, len(func_bodies)),
+            'PARAM'  : (0, num_changed),
+            'STMT'   : (0, len(cfg.functions)),
+            'LEVEL'  : (0, num_changed),
+            'RETURN' : (0, num_changed),
+            'VOCF'   : (0, num_changed)
+        }
+
+    # Store metric values of visited function bodies at function records
+    def recordFunctionMetrics(self, func_bodies):
+        for func_body in func_bodies:
+            metrics = func_body.record.metrics
+            if not self.isMetricSuppressed("PATH"):
+                metrics['PATH'] = func_body.num_paths
+            if not self.isMetricSuppressed("STCYC"):
+                metrics['STCYC'] = self.cyclomaticComplexity(func_body)
+            if not self.isMetricSuppressed("CALLS"):
+                metrics['CALLS'] = len(func_body.called_funcs)
+            if not self.isMetricSuppressed("PARAM"):
+                metrics['PARAM'] = len(func_body.func.argument)
+            if not self.isMetricSuppressed("STMT"):
+                metrics['STMT'] = self.cfg_index.functionStatements(func_body.func)
+            if not self.isMetricSuppressed("VOCF"):
+                metrics['VOCF'] = func_body.vocf_tally.vocf()
+
+    # Collect function bodies of all functions of configuration
+    def collectFunctionBodies(self, data):
+        func_bodies = list()
+        for func in data.functions:
+            for scope in self.cfg_index.functionScopes(func):
+                func_body = HisFunctionBody(func, scope)
+                func_bodies.append(func_body)
+                if not self.use_fingerprints:
+                    continue
+                func_body.body_hash = self.bodyHash(scope)
+                func_body.fingerprint = self.functionFingerprint(scope, func_body.body_hash)
+                func_body.record.fingerprint = func_body.fingerprint
+                self.cfg_index.scope_fingerprints[scope] = func_body.fingerprint
+                self.cfg_index.function_fingerprints.setdefault(func, func_body.fingerprint)
+        return func_bodies
+
+    # Hash of tokens of function body
+    def bodyHash(self, scope):
+        token_strings = list()
+        token = scope.bodyStart
+        while token is not None and token != scope.bodyEnd:
+            token_strings.append(token.str)
+            token = token.next
+        return hashlib.sha1('\x00'.join(token_strings).encode('utf-8')).hexdigest()
+
+    # Fingerprint of function definition by file, line and tokens of body
+    def functionFingerprint(self, scope, body_hash):
+        return '%s:%d:%s' % (scope.bodyStart.file, int(scope.bodyStart.linenr), body_hash)
+
+    # Remove function bodies analyzed before by this checker. Their number
+    # of statements is still part of the lines of statements of HIS-COMF.
+    def removeAnalyzedFunctions(self, func_bodies):
+        remaining_bodies = list()
+        for func_body in func_bodies:
+            if func_body.fingerprint in self.analyzed_functions:
+                self.cfg_index.skipped_statements += self.analyzed_functions[func_body.fingerprint]
+                self.cfg_index.skipped_functions.add(func_body.func)
+                self.cfg_index.skipped_scopes.add(func_body.scope)
             else:
-                try:
-                    cppcheckdata.reportError(token, severity, msg, 'HIS', id)
-                except ValueError:
-                    if self.args.cli:
-                        message = { 'file': token.file,
-                                    'linenr': token.linenr,
-                                    'column': token.column,
-                                    'severity': severity,
-                                    'message': msg,
-                                    'addon': 'HIS',
-                                    'errorId': id,
-                                    'extra': ''}
-                        sys.stdout.write(json.dumps(message) + '\n')
-                    else:
-                        sys.stderr.write('[' + token.file + ':' + str(token.linenr) +
-                                         '] (' + severity + ') ' + msg + ' [HIS-' + id +
-                                         ']\n')
+                remaining_bodies.append(func_body)
+        for func_body in remaining_bodies:
+            self.cfg_index.skipped_functions.discard(func_body.func)
+        return remaining_bodies
+
+    # Set keys of function bodies used by baseline
+    def assignBaselineKeys(self, func_bodies):
+        occurrences = dict()
+        for func_body in func_bodies:
+            record = func_body.record
+            occurrence = occurrences.get((record.tokenDef.file, record.name), 0) + 1
+            occurrences[(record.tokenDef.file, record.name)] = occurrence
+            func_body.baseline_key = HisBaseline.functionKey(record.tokenDef.file, record.name, occurrence)
+
+    # Compare function bodies to baseline and return bodies of new or
+    # changed functions. Unchanged function bodies take their number of
+    # statements, called functions and metric values from baseline.
+    def compareBaseline(self, func_bodies):
+        changed_bodies = list()
+        for func_body in func_bodies:
+            entry = self.baseline.functions.get(func_body.baseline_key)
+            if (entry is not None and entry['hash'] == func_body.body_hash and
+                    entry['params'] == len(func_body.func.argument)):
+                func_body.unchanged = True
+                func_body.baseline_entry = entry
+                func_body.num_statements = len(entry['statements'])
+                func_body.called_funcs = set(entry['called_funcs'])
+                func_body.record.metrics = dict(entry['metrics'])
+                self.cfg_index.skipped_functions.add(func_body.func)
+                self.cfg_index.skipped_scopes.add(func_body.scope)
+            else:
+                changed_bodies.append(func_body)
+        for func_body in changed_bodies:
+            self.cfg_index.skipped_functions.discard(func_body.func)
+        return changed_bodies
+
+    # Add snapshot of function bodies to baseline functions of dump file.
+    # Count statements of changed function bodies which are new, changed
+    # or deleted compared to baseline.
+    def snapshotFunctions(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            if func_body.unchanged:
+                self.baseline_functions.append([func_body.baseline_key, func_body.baseline_entry, func_body.fingerprint, [0, 0, 0]])
+                continue
+            record = func_body.record
+            entry = {
+                'file'        : record.tokenDef.file,
+                'name'        : record.name,
+                'hash'        : func_body.body_hash,
+                'params'      : len(func_body.func.argument),
+                'statements'  : self.statementHashes(func_body.scope),
+                'metrics'     : record.metrics,
+                'called_funcs': sorted(func_body.called_funcs)
+            }
+            changes = [len(entry['statements']), 0, 0]
+            if self.baseline is not None and func_body.baseline_key in self.baseline.functions:
+                old_entry = self.baseline.functions[func_body.baseline_key]
+                changes = HisBaseline.statementChanges(old_entry['statements'], entry['statements'])
+            self.baseline_functions.append([func_body.baseline_key, entry, func_body.fingerprint, changes])
+            if self.baseline is not None:
+                self.addStatistics("HIS-SNEW  - %s: %d" % (record.name.ljust(50), changes[0]))
+                self.addStatistics("HIS-SCHG  - %s: %d" % (record.name.ljust(50), changes[1]))
+                self.addStatistics("HIS-SDEL  - %s: %d" % (record.name.ljust(50), changes[2]))
+
+    # Hashes of statements of function body. Tokens are grouped into
+    # statements by lines the same way as statements are counted.
+    def statementHashes(self, scope):
+        statements = list()
+        current_line_nr = -1
+        token = scope.bodyStart.next
+        while token is not None and token != scope.bodyEnd:
+            if self.isBracketLine(token):
+                token = token.next
+                continue
+            if current_line_nr != token.linenr:
+                statements.append(list())
+                current_line_nr = token.linenr
+            statements[-1].append(token.str)
+            token = token.next
+        return [hashlib.sha1(' '.join(statement).encode('utf-8')).hexdigest()[:16] for statement in statements]
+
+    # Iterate function bodies to report. Output and statistics are
+    # tagged with the fingerprint of the function body reported.
+    def reportedBodies(self, func_bodies):
+        for func_body in func_bodies:
+            self.report_fingerprint = func_body.fingerprint
+            yield func_body
+        self.report_fingerprint = None
+
+    # Add entry to statistics list tagged with fingerprint of
+    # function reported
+    def addStatistics(self, item):
+        if self.report_fingerprint is not None:
+            self.statistics_fingerprints.append([len(self.statistics_list), self.report_fingerprint])
+        self.statistics_list.append(item)
+
+    # Walk through function body once and collect values of all
+    # function metrics which are not suppressed.
+    def visitFunctionBody(self, data, func_body):
+        count_statements = not self.isMetricSuppressed("STMT") or not self.isMetricSuppressed("COMF")
+        collect_calls = not self.isMetricSuppressed("CALLING") or not self.isMetricSuppressed("CALLS")
+        count_return_points = not self.isMetricSuppressed("RETURN")
+        count_vocf = not self.isMetricSuppressed("VOCF")
+        keyword_dispatch = self.keyword_dispatch
+        scope = func_body.scope
+        if self.token_arrays is not None:
+            body_range = self.token_arrays.bodyRange(scope)
+            if body_range is not None:
+                self.visitFunctionBodyArrays(data, func_body, body_range)
+                return
+        token = scope.bodyStart.next
+        while token is not None and token != scope.bodyEnd:
+            if count_statements:
+                self.visitStatementToken(func_body, token)
+            if collect_calls and self.isFunctionCall(token):
+                # Duplicates are ignored by set
+                func_body.called_funcs.add(token.str)
+            if count_return_points and func_body.num_return_points < 2:
+                self.visitReturnToken(data, func_body, token)
+            # Closing pairwise operators have already been counted by
+            # corresponding opening operators.
+            if count_vocf and token.str not in self.closing_pairwise_operators:
+                func_body.vocf_tally.addToken(token.str, self.isVocfOperator(token))
+            handlers = keyword_dispatch.get(token.str)
+            if handlers is not None:
+                for handler in handlers:
+                    handler(func_body, token)
+            token = token.next
+
+        # Search for open curly bracket of compound statement continues
+        # behind function body. Calculate nesting levels as before.
+        if func_body.level_compound_stm is not None:
+            func_body.level_violations = self.nestingLevelViolations(data, scope)
+        # End of skipped lambda function body is not part of function
+        # body. Count return points as before.
+        if func_body.return_skip_end is not None:
+            func_body.num_return_points = self.numOfReturnPoints(data, scope)
+
+    # Collect values of function metrics which are not suppressed
+    # by counting token kinds of function body using token arrays.
+    # Results are the same as of walking through function body.
+    def visitFunctionBodyArrays(self, data, func_body, body_range):
+        token_arrays = self.token_arrays
+        start, end = body_range
+        kind_counts = token_arrays.kindCounts(start, end)
+        if not self.isMetricSuppressed("STMT") or not self.isMetricSuppressed("COMF"):
+            func_body.num_statements = token_arrays.numOfLines(start, end, func_body.current_line_nr)
+        if not self.isMetricSuppressed("CALLING") or not self.isMetricSuppressed("CALLS"):
+            func_body.called_funcs = token_arrays.calledFunctions(start, end)
+        if not self.isMetricSuppressed("RETURN"):
+            # Return points of lambda functions are skipped by walking
+            # through function body.
+            if token_arrays.hasLambdas(start, end):
+                func_body.num_return_points = self.numOfReturnPoints(data, func_body.scope)
+            else:
+                func_body.num_return_points = min(token_arrays.kindCount(kind_counts, "return"), 2)
+        if not self.isMetricSuppressed("PATH"):
+            num_branches = 0
+            for keyword in ["if", "for", "do", "while"]:
+                num_branches += token_arrays.kindCount(kind_counts, keyword)
+            path_mask = token_arrays.kindMask("path", ["switch", "while"])
+            for token in token_arrays.tokensOfKind(path_mask, start, end):
+                if token.str == "switch":
+                    func_body.num_paths *= (1 + self.numOfSwitchCases(token))
+                elif self.isWhileOfDoWhile(token):
+                    num_branches -= 1
+            func_body.num_paths *= 2 ** num_branches
+        if not self.isMetricSuppressed("STCYC"):
+            for keyword, increments in self.stcyc_increments.items():
+                num_keywords = token_arrays.kindCount(kind_counts, keyword)
+                func_body.num_nodes += num_keywords * increments[0]
+                func_body.num_edges += num_keywords * increments[1]
+        if not self.isMetricSuppressed("VOCF"):
+            operator_mask, operand_mask = self.vocfTokenMasks()
+            func_body.vocf_tally.operators = token_arrays.kindStringCounts(operator_mask, start, end)
+            func_body.vocf_tally.operands = token_arrays.kindStringCounts(operand_mask, start, end)
+        if not self.isMetricSuppressed("LEVEL"):
+            level_mask = token_arrays.kindMask("level", list(self.compound_statement_keywords) + ["{"])
+            for token in token_arrays.tokensOfKind(level_mask, start, end):
+                if token.str == "{":
+                    self.visitLevelCompoundStart(func_body, token)
+                else:
+                    self.visitLevelKeyword(func_body, token)
+            # Search for open curly bracket of compound statement continues
+            # behind function body. Calculate nesting levels as before.
+            if func_body.level_compound_stm is not None:
+                func_body.level_violations = self.nestingLevelViolations(data, func_body.scope)
+
+    # Walk through token list once and collect goto statements
+    # plus operators and operands for HIS-VOCF. Operators and operands
+    # of visited function bodies have been counted by their tallies,
+    # which are added instead. Tallies of function bodies nested in
+    # another visited function body are part of its tally.
+    def visitTokenList(self, data, func_bodies):
+        goto_tokens = list()
+        find_goto = not self.isMetricSuppressed("GOTO")
+        count_vocf = not self.isMetricSuppressed("VOCF")
+        if not find_goto and not count_vocf:
+            return goto_tokens
+        if self.token_arrays is not None:
+            return self.visitTokenListArrays(find_goto, count_vocf, func_bodies)
+        body_starts = dict((func_body.scope.bodyStart, func_body) for func_body in func_bodies)
+        body_end = None
+        for token in data.tokenlist:
+            if find_goto and token.str == "goto":
+                goto_tokens.append(token)
+            if not count_vocf:
+                continue
+            if body_end is not None:
+                if token == body_end:
+                    body_end = None
+                continue
+            func_body = body_starts.get(token)
+            if func_body is not None:
+                self.vocf_tally.update(func_body.vocf_tally)
+                body_end = func_body.scope.bodyEnd
+            # Closing pairwise operators have already been counted by 
+            # corresponding opening operators.
+            if token.str in self.closing_pairwise_operators:
+                continue
+            self.vocf_tally.addToken(token.str, self.isVocfOperator(token))
+        return goto_tokens
+
+    # Is token counted as operator of HIS-VOCF
+    def isVocfOperator(self, token):
+        return token.str in self.operators or token.str in self.keywords or self.isFunctionCall(token)
+
+    # Get masks of token arrays selecting tokens counted as
+    # operators and operands of HIS-VOCF
+    def vocfTokenMasks(self):
+        token_arrays = self.token_arrays
+        if token_arrays.vocf_masks is None:
+            # Closing pairwise operators have already been counted by
+            # corresponding opening operators.
+            closing_mask = token_arrays.kindMask("closing", self.closing_pairwise_operators)
+            operator_mask = token_arrays.kindMask("operators", self.operators | self.keywords)
+            counted = ~closing_mask[token_arrays.kinds]
+            operators = operator_mask[token_arrays.kinds] | token_arrays.calls
+            token_arrays.vocf_masks = (operators & counted, ~operators & counted)
+        return token_arrays.vocf_masks
+
+    # Collect goto statements plus operators and operands for HIS-VOCF
+    # by token kinds of token arrays. Tokens of visited function bodies
+    # are masked and their tallies are added instead.
+    def visitTokenListArrays(self, find_goto, count_vocf, func_bodies):
+        token_arrays = self.token_arrays
+        num_tokens = len(token_arrays.kinds)
+        goto_tokens = list()
+        if find_goto:
+            goto_mask = token_arrays.kindMask("goto", ["goto"])
+            goto_tokens = token_arrays.tokensOfKind(goto_mask, 0, num_tokens)
+        if count_vocf:
+            # Function bodies without range are counted as part of token list
+            body_ranges = list()
+            for func_body in func_bodies:
+                body_range = token_arrays.bodyRange(func_body.scope)
+                if body_range is not None:
+                    body_ranges.append((body_range, func_body))
+            outside = numpy.ones(num_tokens, dtype=bool)
+            body_end = 0
+            for (start, end), func_body in sorted(body_ranges, key=lambda body: body[0]):
+                if start < body_end:
+                    continue
+                outside[start:end] = False
+                body_end = end
+                self.vocf_tally.update(func_body.vocf_tally)
+            operator_mask, operand_mask = self.vocfTokenMasks()
+            self.vocf_tally.operators.update(token_arrays.kindStringCounts(operator_mask & outside, 0, num_tokens))
+            self.vocf_tally.operands.update(token_arrays.kindStringCounts(operand_mask & outside, 0, num_tokens))
+        return goto_tokens
+
+    # Count line of statements of function body token
+    def visitStatementToken(self, func_body, token):
+        if self.isBracketLine(token):
+            return
+        # Make sure to count each line just once
+        if func_body.current_line_nr != token.linenr:
+            func_body.num_statements += 1
+            func_body.current_line_nr = token.linenr
+
+    # Is token an opening or closing curly bracket or semicolon on a line
+    # of its own. Such lines aren't statements.
+    def isBracketLine(self, token):
+        if token.str.startswith("{") or token.str.startswith("}") or token.str.startswith(";"):
+            return token.linenr != token.previous.linenr and token.linenr != token.next.linenr
+        return False
+
+    # Count return points of function body token. Skip all tokens
+    # up to end of lambda function body.
+    def visitReturnToken(self, data, func_body, token):
+        if func_body.return_skip_end is not None:
+            if token != func_body.return_skip_end:
+                return
+            func_body.return_skip_end = None
+        else:
+            next_token = self.skipLambdaFunction(data, func_body.scope, token)
+            if next_token != token:
+                func_body.return_skip_end = next_token
+                return
+        if token.str == "return":
+            func_body.num_return_points += 1
+
+    # HIS-PATH keyword handler
+    def visitPathKeyword(self, func_body, token):
+        if token.str == "switch":
+            func_body.num_paths *= (1 + self.numOfSwitchCases(token))
+        elif token.str != "while" or not self.isWhileOfDoWhile(token):
+            func_body.num_paths *= 2
+
+    # HIS-STCYC keyword handler
+    def visitStcycKeyword(self, func_body, token):
+        num_nodes, num_edges = self.stcyc_increments[token.str]
+        func_body.num_nodes += num_nodes
+        func_body.num_edges += num_edges
+
+    # HIS-LEVEL keyword handler
+    def visitLevelKeyword(self, func_body, token):
+        # Walk forward through token list until open curly
+        # bracket of scope has been reached.
+        if func_body.level_compound_stm is not None:
+            return
+        # Ignore while of do-while loop
+        if token.str == "while" and self.isWhileOfDoWhile(token):
+            return
+        func_body.level_compound_stm = token
+
+    # HIS-LEVEL open curly bracket handler
+    def visitLevelCompoundStart(self, func_body, token):
+        if func_body.level_compound_stm is None:
+            return
+        # Nesting level starts at depth 1 for function entry
+        nesting_level = 1
+        nesting_level += self.calculateNestingLevel(token.scope, func_body.scope)
+        if nesting_level > self.his_metric_upper_limit['LEVEL']:
+            func_body.level_violations.append((func_body.level_compound_stm, nesting_level))
+        func_body.level_compound_stm = None
+
+    # Add error report entry
+    def reportError(self, token, severity, msg, id):
+        if self.diagnostics is not None:
+            self.collectError(token, severity, msg, id)
+        elif token is not None and self.args.verify:
+            self.verify_actual.add(token.file + ':' + str(token.linenr) + ':HIS-' + id)
+        elif token is None or self.is_suppressed is None or not self.is_suppressed(token, msg, 'HIS-' + id):
+            self.reporter.write(self.formatDiagnostic(token, severity, msg, id))
         self.his_stats[id] = self.his_stats[id] + 1
+        if self.report_fingerprint is not None:
+            function_stats = self.function_stats.setdefault(self.report_fingerprint, dict())
+            function_stats[id] = function_stats.get(id, 0) + 1
+
+    # Diagnostic line as printed by Cppcheck addons
+    def textDiagnostic(self, token, severity, msg, id):
+        if token is None:
+            location = '[All files:---]'
+        else:
+            location = '[' + token.file + ':' + str(token.linenr) + ']'
+        return location + ' (' + severity + ') ' + msg + ' [HIS-' + id + ']\n'
+
+    # JSON serializable error message as printed for Cppcheck.
+    # Diagnostic of JSON output, serialized by reporter.
+    def errorMessage(self, token, severity, msg, id):
+        if token is None:
+            file, linenr, column = 'All files', 0, 0
+        else:
+            file, linenr, column = token.file, token.linenr, token.column
+        return { 'file': file,
+                 'linenr': linenr,
+                 'column': column,
+                 'severity': severity,
+                 'message': msg,
+                 'addon': 'HIS',
+                 'errorId': id,
+                 'extra': ''}
+
+    # Add error message to diagnostics unless it's suppressed
+    # by inline suppressions of dump file
+    def collectError(self, token, severity, msg, id):
+        if token is not None and hasattr(cppcheckdata, 'is_suppressed'):
+            if cppcheckdata.is_suppressed(token, msg, 'HIS-' + id):
+                return
+        self.diagnostics.append(self.errorMessage(token, severity, msg, id))
 
     # Is this a function call
     def isFunctionCall(self, token):
@@ -343,54 +3150,24 @@ class HisMetricChecker():
             return False
         return True
 
-    # Does the scope match the function object
-    def scopeMatchesFunction(self, scope, func):
-        ret_val = False
-        if hasattr(scope, 'function'):
-            if scope.function == func:
-                ret_val = True
-        elif scope.className == func.name:
-            ret_val = True
-
-        return ret_val
-
     # If token is the starting point of a lambda function
     # then skip all tokens of lambda function body.
     def skipLambdaFunction(self, data, scope, token):
         next_token = token
         if hasattr(token, 'function') and token.function is not None:
-            # Search for scope of lambda function
-            for scope in data.scopes:
-                if scope.type == "Lambda" and self.scopeMatchesFunction(scope, token.function):
-                    next_token = scope.bodyEnd
-                    break
+            # Look up scope of lambda function
+            lambda_body_end = self.cfg_index.lambdaBodyEnd(token.function)
+            if lambda_body_end is not None:
+                next_token = lambda_body_end
         elif token.scope != scope and token.scope.type == "Lambda":
             next_token = token.scope.bodyEnd
         return next_token
 
-    # Count line of statements in function
-    def numOfFunctionStatements(self, func, data):
-        num_of_statements = 0
-        for scope in data.scopes:
-            if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                token = scope.bodyStart.next
-                current_line_nr = -1
-                # Search function body and count statements
-                while token is not None and token != scope.bodyEnd:
-                    # Ignore lines with just a opening or closing curly bracket or semicolon
-                    if token.str.startswith("{") or token.str.startswith("}") or token.str.startswith(";"):
-                        if token.linenr != token.previous.linenr and token.linenr != token.next.linenr:
-                            token = token.next
-                            continue
-                    # Make sure to count each line just once
-                    if current_line_nr != token.linenr:
-                        num_of_statements += 1
-                        current_line_nr = token.linenr
-                    token = token.next
-        return num_of_statements
-
     # Calculate nesting level of token scope regarding final scope
-    def calculateNestingLevel(self, data, token_scope, final_scope):
+    def calculateNestingLevel(self, token_scope, final_scope):
+        nesting_level = self.cfg_index.functionDepth(token_scope, final_scope)
+        if nesting_level is not None:
+            return nesting_level
         nesting_level = 0
         scope = token_scope
         while scope is not None and scope != final_scope:
@@ -404,6 +3181,9 @@ class HisMetricChecker():
         while token is not None and token.str != "{":
             token = token.next
         if token is not None:
+            num_switch_cases = self.cfg_index.switchCases(token)
+            if num_switch_cases is not None:
+                return num_switch_cases
             token_switch_end = token.link
         while token is not None and token != token_switch_end:
             if token.str == "case":
@@ -420,14 +3200,13 @@ class HisMetricChecker():
 
     # HIS-COMF
     # Relationship of comments to number of statements: > 0.2
-    def his_comf(self, data, rawTokens):
+    def his_comf(self, rawTokens):
         # Set line of statements initial/minimum value to 1.0
         # to avoid division by zero.
         lines_of_statements = 1.0
         lines_of_comments = 0.0
         # Count line of statements in functions
-        for func in data.functions:
-            lines_of_statements += self.numOfFunctionStatements(func, data)
+        lines_of_statements += self.cfg_index.totalStatements()
 
         # Count line of comments
         for token in rawTokens:
@@ -444,89 +3223,55 @@ class HisMetricChecker():
 
     # HIS-PATH
     # Number of non cyclic remark paths: 1-80
-    def his_path(self, data):
-        for func in data.functions:
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    # Calculate number of non cyclic remark paths for function body
-                    num_paths = 1
-                    token = scope.bodyStart
-                    while token is not None and token != scope.bodyEnd:
-                        if token.str in ["if", "for", "do"]:
-                            num_paths *= 2
-                        elif token.str == "while" and not self.isWhileOfDoWhile(token):
-                            num_paths *= 2
-                        elif token.str == "switch":
-                            num_paths *= (1 + self.numOfSwitchCases(token))
-                        token = token.next
-                    self.statistics_list.append("HIS-PATH  - %s: %d" % (func.name.ljust(50), num_paths))
-                    if num_paths > self.his_metric_upper_limit['PATH']:
-                        self.reportError(func.tokenDef, 'style', 'Number of non cyclic remark paths: 1-80'+ ' (' + str(num_paths) + ')', 'PATH')
+    def his_path(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            func = func_body.func
+            num_paths = func_body.num_paths
+            self.addStatistics("HIS-PATH  - %s: %d" % (func.name.ljust(50), num_paths))
+            if num_paths > self.his_metric_upper_limit['PATH']:
+                self.reportError(func.tokenDef, 'style', 'Number of non cyclic remark paths: 1-80'+ ' (' + str(num_paths) + ')', 'PATH')
 
     # HIS-GOTO
     # Number of goto statements: 0
-    def his_goto(self, data):
-        for token in data.tokenlist:
-            if token.str == "goto":
-                self.reportError(token, 'style', 'Number of goto Statements should be 0', 'GOTO')
+    def his_goto(self, goto_tokens):
+        for token in goto_tokens:
+            # Functions analyzed before or unchanged functions of
+            # baseline have been reported already
+            if self.cfg_index.scope_function.get(token.scope) in self.cfg_index.skipped_scopes:
+                continue
+            self.report_fingerprint = self.cfg_index.bodyFingerprint(token.scope)
+            self.reportError(token, 'style', 'Number of goto Statements should be 0', 'GOTO')
+        self.report_fingerprint = None
 
     # HIS-STCYC
     # Cyclomatic complexity v(G) of functions by McCabe: 1-10
-    def his_stcyc(self, data):
-        for func in data.functions:
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    # Calculate cyclomatic complexity for function body
-                    vG = 0
-                    num_nodes = 2
-                    num_edges = 1
-                    num_components = 1
-                    token = scope.bodyStart
-                    while token is not None and token != scope.bodyEnd:
-                        if token.str in ["for", "while", "do"]:
-                            num_nodes += 3
-                            num_edges += 4
-                        elif token.str == "if":
-                            num_nodes += 3
-                            num_edges += 4
-                        elif token.str == "else":
-                            num_nodes += 1
-                            num_edges += 1
-                        elif token.str == "switch":
-                            num_nodes += 2
-                            num_edges += 1
-                        elif token.str in ["case", "default"]:
-                            num_nodes += 1
-                            num_edges += 2
-                        token = token.next
-                    vG = num_edges - num_nodes + (2 * num_components)
-                    self.statistics_list.append("HIS-STCYC - %s: %d (edges: %d, nodes: %d)" % (func.name.ljust(50), vG, num_edges, num_nodes))
-                    if vG > self.his_metric_upper_limit['STCYC']:
-                        self.reportError(func.tokenDef, 'style', 'Cyclomatic complexity v(G) of functions by McCabe: 1-10' + ' (' + str(vG) + ')', 'STCYC')
+    def his_stcyc(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            func = func_body.func
+            num_nodes = func_body.num_nodes
+            num_edges = func_body.num_edges
+            vG = self.cyclomaticComplexity(func_body)
+            self.addStatistics("HIS-STCYC - %s: %d (edges: %d, nodes: %d)" % (func.name.ljust(50), vG, num_edges, num_nodes))
+            if vG > self.his_metric_upper_limit['STCYC']:
+                self.reportError(func.tokenDef, 'style', 'Cyclomatic complexity v(G) of functions by McCabe: 1-10' + ' (' + str(vG) + ')', 'STCYC')
+
+    # Calculate cyclomatic complexity for function body
+    def cyclomaticComplexity(self, func_body):
+        num_components = 1
+        return func_body.num_edges - func_body.num_nodes + (2 * num_components)
 
     # HIS-CALLING
     # Number of subfunctions calling a function: 0-5
-    def his_calling(self, data):
-        for func in data.functions:            
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    self.function_list.append(func)
-                    # Search function body for function calls reduced
-                    # by duplicates
-                    token = scope.bodyStart
-                    called_funcs = list()
-                    while token is not None and token != scope.bodyEnd:
-                        if self.isFunctionCall(token):
-                            if token.str not in called_funcs:
-                                called_funcs.append(token.str)
-                                if token.str not in self.function_calls:
-                                    self.function_calls[token.str] = 1
-                                else:
-                                    self.function_calls[token.str] = self.function_calls[token.str] + 1
-                        token = token.next
+    def his_calling(self, func_bodies):
+        for func_body in func_bodies:
+            func_body.record.called_funcs = sorted(func_body.called_funcs)
+            self.function_list.append(func_body.record)
+            # Count function calls reduced by duplicates
+            for called_func in func_body.called_funcs:
+                if called_func not in self.function_calls:
+                    self.function_calls[called_func] = 1
+                else:
+                    self.function_calls[called_func] = self.function_calls[called_func] + 1
 
     # HIS-CALLING calculate result
     def his_calling_result(self):
@@ -538,156 +3283,227 @@ class HisMetricChecker():
 
     # HIS-CALLS
     # Number of called functions excluding duplicates: 0-7
-    def his_calls(self, data):
-        for func in data.functions:
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    # Search function body for function calls
-                    token = scope.bodyStart
-                    func_calls = list()
-                    while token is not None and token != scope.bodyEnd:
-                        if self.isFunctionCall(token):
-                            # Don't add duplicates
-                            if token.str not in func_calls:
-                                func_calls.append(token.str)
-                        token = token.next
-                    self.functions_called[func.name] = func_calls
-                    if len(func_calls) > self.his_metric_upper_limit['CALLS']:
-                        self.reportError(func.tokenDef, 'style', 'Number of called functions excluding duplicates: 0-7' + ' (' + str(len(func_calls)) + ')', 'CALLS')
+    def his_calls(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            func = func_body.func
+            func_calls = sorted(func_body.called_funcs)
+            self.functions_called[func.name] = func_calls
+            # Unchanged functions of baseline aren't reported again
+            if func_body.unchanged:
+                continue
+            if len(func_calls) > self.his_metric_upper_limit['CALLS']:
+                self.reportError(func.tokenDef, 'style', 'Number of called functions excluding duplicates: 0-7' + ' (' + str(len(func_calls)) + ')', 'CALLS')
 
     # HIS-PARAM
     # Number of function parameters: 0-5
-    def his_param(self, data):
-        for func in data.functions:
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    # Check number of function parameters
-                    self.statistics_list.append("HIS-PARAM - %s: %d" % (func.name.ljust(50), len(func.argument)))
-                    if len(func.argument) > self.his_metric_upper_limit['PARAM']:
-                        self.reportError(func.tokenDef, 'style', 'Number of function parameters: 0-5' + ' (' + str(len(func.argument)) + ')', 'PARAM')
+    def his_param(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            func = func_body.func
+            # Check number of function parameters
+            self.addStatistics("HIS-PARAM - %s: %d" % (func.name.ljust(50), len(func.argument)))
+            if len(func.argument) > self.his_metric_upper_limit['PARAM']:
+                self.reportError(func.tokenDef, 'style', 'Number of function parameters: 0-5' + ' (' + str(len(func.argument)) + ')', 'PARAM')
 
     # HIS-STMT
     # Number of statements per function: 1-50
     def his_stmt(self, data):
-        num_of_statements = 0
-        # Count line of statements in functions
         for func in data.functions:
-            num_of_statements = self.numOfFunctionStatements(func, data)
-            self.statistics_list.append("HIS-STMT  - %s: %d" % (func.name.ljust(50), num_of_statements))
+            # Functions analyzed before or unchanged functions of
+            # baseline have been reported already
+            if func in self.cfg_index.skipped_functions:
+                continue
+            self.report_fingerprint = self.cfg_index.function_fingerprints.get(func)
+            num_of_statements = self.cfg_index.functionStatements(func)
+            self.addStatistics("HIS-STMT  - %s: %d" % (func.name.ljust(50), num_of_statements))
             if num_of_statements > self.his_metric_upper_limit['STMT']:
                 self.reportError(func.tokenDef, 'style', 'Number of statements per function: 1-50' + ' (' + str(num_of_statements) + ')', 'STMT')
+        self.report_fingerprint = None
 
     # HIS-LEVEL
     # Depth of nesting of a function: 0-4
-    def his_level(self, data):
-        for func in data.functions:
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    # Search function body and calculate nesting depth
-                    token = scope.bodyStart
-                    while token is not None and token != scope.bodyEnd:
-                        if token.str not in ["if", "switch", "for", "while", "do"]:
-                            token = token.next
-                            continue
-                        # Ignore while of do-while loop
-                        if token.str == "while" and self.isWhileOfDoWhile(token):
-                            token = token.next
-                            continue
-                        token_compound_stm = token
-                        # Walk forward through token list until open curly
-                        # bracket of scope has been reached.
-                        while token is not None and token.str != "{":
-                            token = token.next
-                        # Calculate nesting level of current scope
-                        if token is not None:
-                            # Nesting level starts at depth 1 for function entry
-                            nesting_level = 1
-                            nesting_level += self.calculateNestingLevel(data, token.scope, scope)
-                            if nesting_level > self.his_metric_upper_limit['LEVEL']:
-                                self.reportError(token_compound_stm, 'style', 'Depth of nesting of a function: 0-4' + ' (' + str(nesting_level) + ')', 'LEVEL')
+    def his_level(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            for token_compound_stm, nesting_level in func_body.level_violations:
+                self.reportError(token_compound_stm, 'style', 'Depth of nesting of a function: 0-4' + ' (' + str(nesting_level) + ')', 'LEVEL')
+
+    # Determine nesting levels of compound statements of function body
+    # exceeding upper limit by walking through token list.
+    def nestingLevelViolations(self, data, scope):
+        level_violations = list()
+        token = scope.bodyStart
+        while token is not None and token != scope.bodyEnd:
+            if token.str not in self.compound_statement_keywords:
+                token = token.next
+                continue
+            # Ignore while of do-while loop
+            if token.str == "while" and self.isWhileOfDoWhile(token):
+                token = token.next
+                continue
+            token_compound_stm = token
+            # Walk forward through token list until open curly
+            # bracket of scope has been reached.
+            while token is not None and token.str != "{":
+                token = token.next
+            # Calculate nesting level of current scope
+            if token is not None:
+                # Nesting level starts at depth 1 for function entry
+                nesting_level = 1
+                nesting_level += self.calculateNestingLevel(token.scope, scope)
+                if nesting_level > self.his_metric_upper_limit['LEVEL']:
+                    level_violations.append((token_compound_stm, nesting_level))
+        return level_violations
 
     # HIS-RETURN
     # Number of return points within a function: 0-1
-    def his_return(self, data):
-        for func in data.functions:
-            # Search for scope of current function
-            for scope in data.scopes:
-                if scope.type == "Function" and self.scopeMatchesFunction(scope, func):
-                    # Search function body for return key word
-                    token = scope.bodyStart
-                    num_return_points = 0
-                    while token is not None and token != scope.bodyEnd and num_return_points < 2:
-                        token = self.skipLambdaFunction(data, scope, token)
-                        if token.str == "return":
-                            num_return_points += 1
-                        token = token.next
-                    if num_return_points > self.his_metric_upper_limit['RETURN']:
-                        self.reportError(func.tokenDef, 'style', 'Number of return points within a function: 0-1' + ' (' + str(num_return_points) + ')', 'RETURN')
+    def his_return(self, func_bodies):
+        for func_body in self.reportedBodies(func_bodies):
+            num_return_points = func_body.num_return_points
+            if num_return_points > self.his_metric_upper_limit['RETURN']:
+                self.reportError(func_body.func.tokenDef, 'style', 'Number of return points within a function: 0-1' + ' (' + str(num_return_points) + ')', 'RETURN')
+
+    # Count return points of function body by walking through token list
+    def numOfReturnPoints(self, data, scope):
+        # Search function body for return key word
+        token = scope.bodyStart
+        num_return_points = 0
+        while token is not None and token != scope.bodyEnd and num_return_points < 2:
+            token = self.skipLambdaFunction(data, scope, token)
+            if token.str == "return":
+                num_return_points += 1
+            token = token.next
+        return num_return_points
 
     # HIS-VOCF
     # Language scope: 1-4
-    def his_vocf(self, data):
-        for token in data.tokenlist:
-            # Closing pairwise operators have already been counted by 
-            # corresponding opening operators.
-            if token.str in self.closing_pairwise_operators:
+    # Checked per function and dump file. Tally of dump file is the sum of
+    # tallies of function bodies and of tokens outside of them.
+    def his_vocf(self, func_bodies, rawTokens):
+        for func_body in self.reportedBodies(func_bodies):
+            func = func_body.func
+            vocf = func_body.vocf_tally.vocf()
+            if vocf is None:
                 continue
-            if token.str in self.operators or token.str in self.keywords or self.isFunctionCall(token):
-                self.sum_of_operators += 1
-                if token.str not in self.distinct_operator_list:
-                    self.distinct_operator_list.append(token.str)
-            else:
-                self.sum_of_operands += 1
-                if token.str not in self.distinct_operand_list:
-                    self.distinct_operand_list.append(token.str)
+            self.addStatistics("HIS-VOCF  - %s: %d" % (func.name.ljust(50), vocf))
+            if vocf < 1 or vocf > 4:
+                self.reportError(func.tokenDef, 'style', 'Language scope: 1-4' + ' (' + str(vocf) + ')', 'VOCF')
+        vocf = self.vocf_tally.vocf()
+        if vocf is not None and len(rawTokens) > 0:
+            self.statistics_list.append("HIS-VOCF  - %s: %d" % (('file ' + rawTokens[0].file).ljust(50), vocf))
+            if vocf < 1 or vocf > 4:
+                self.reportError(rawTokens[0], 'style', 'Language scope: 1-4' + ' (' + str(vocf) + ')', 'VOCF')
 
-    # HIS-VOCF calculate result
+    # HIS-NOMV
+    # Number of MISRA HIS subset violations: 0
+    def his_nomv(self, violations, rawTokens):
+        if len(rawTokens) == 0:
+            return
+        self.statistics_list.append("HIS-NOMV  - %s: %d" % (('file ' + rawTokens[0].file).ljust(49), len(violations)))
+        if len(violations) > self.his_metric_upper_limit['NOMV']:
+            self.reportError(rawTokens[0], 'style', 'Number of MISRA HIS subset violations: 0' + ' (' + str(len(violations)) + ')', 'NOMV')
+
+    # HIS-NOMVPR
+    # Number of MISRA HIS subset violations per rule: 0
+    # Reported at first violation of each rule.
+    def his_nomvpr(self, violations):
+        rule_violations = dict()
+        for location, rule in violations:
+            rule_violations.setdefault(rule, list()).append(location)
+        for rule in sorted(rule_violations, key=lambda rule: [int(number) for number in re.findall(r'\d+', rule)]):
+            locations = rule_violations[rule]
+            self.statistics_list.append("HIS-NOMVPR - rule %s: %d" % (rule.ljust(43), len(locations)))
+            if len(locations) > self.his_metric_upper_limit['NOMVPR']:
+                self.reportError(locations[0], 'style', 'Number of MISRA HIS subset violations per rule: 0' + ' (rule ' + rule + ': ' + str(len(locations)) + ')', 'NOMVPR')
+
+    # HIS-VOCF calculate result across all dump files
+    # by summing up tallies of dump files
     def his_vocf_result(self):
-        #printf("Distinct operators: %d\n", len(self.distinct_operator_list))
-        #printf("Sum of operators  : %d\n", self.sum_of_operators)
-        #printf("Distinct operands : %d\n", len(self.distinct_operand_list))
-        #printf("Sum of operands   : %d\n", self.sum_of_operands)
-        if len(self.distinct_operator_list) > 0 or len(self.distinct_operand_list) > 0:
-            vocf = (self.sum_of_operators + self.sum_of_operands) // (len(self.distinct_operator_list) + len(self.distinct_operand_list))
+        vocf = self.vocf_tally.vocf()
+        if vocf is not None:
+            self.statistics_list.append("HIS-VOCF  - %s: %d" % ('all files'.ljust(50), vocf))
             if vocf < 1 or vocf > 4:
                 self.reportError(None, 'style', 'Language scope: 1-4', 'VOCF')
-        #printf("VOCF              : %d\n", vocf)
 
-    # Check call path if there is a recursive call to function given by func_name
-    def isRecursiveFunctionCall(self, function_name, called_function_name, called_functions_done):
-        # Skip if check for called function has already been done
-        if called_function_name in called_functions_done:
-            return
-        # Skip if function declaration is not part of given dump file
-        if called_function_name not in self.functions_called:
-            return
-        # Compare names to check for recursive function call
-        if function_name == called_function_name:
-            for func in self.function_list:
-                if func.name == function_name:
-                    self.reportError(func.tokenDef, 'style', 'Number of recursions: 0', 'NRECUR')
-            return
-        else:
-            # Register called function name as done
-            called_functions_done.append(called_function_name)
-            # Run check for next function call level
-            for func_call in self.functions_called[called_function_name]:
-                self.isRecursiveFunctionCall(function_name, func_call, called_functions_done)
+    # Determine strongly connected components of call graph of functions
+    # defined in dump file(s) by an iterative Tarjan algorithm.
+    # Returns dictionary to store list of functions of recursive call cycle
+    # referenced by name of each function which is part of a cycle.
+    def recursiveFunctionCycles(self):
+        recursion_cycles = dict()
+        index = dict()
+        lowlink = dict()
+        component_stack = list()
+        on_component_stack = set()
+        next_index = 0
+        for root_name in self.functions_called:
+            if root_name in index:
+                continue
+            index[root_name] = lowlink[root_name] = next_index
+            next_index += 1
+            component_stack.append(root_name)
+            on_component_stack.add(root_name)
+            # Stack of functions and iterators of their called functions
+            call_stack = [(root_name, iter(self.functions_called[root_name]))]
+            while call_stack:
+                func_name, func_calls = call_stack[-1]
+                descended = False
+                for func_call in func_calls:
+                    # Skip if function declaration is not part of given dump file
+                    if func_call not in self.functions_called:
+                        continue
+                    if func_call not in index:
+                        index[func_call] = lowlink[func_call] = next_index
+                        next_index += 1
+                        component_stack.append(func_call)
+                        on_component_stack.add(func_call)
+                        call_stack.append((func_call, iter(self.functions_called[func_call])))
+                        descended = True
+                        break
+                    if func_call in on_component_stack:
+                        lowlink[func_name] = min(lowlink[func_name], index[func_call])
+                if descended:
+                    continue
+                call_stack.pop()
+                if call_stack:
+                    caller_name = call_stack[-1][0]
+                    lowlink[caller_name] = min(lowlink[caller_name], lowlink[func_name])
+                if lowlink[func_name] == index[func_name]:
+                    # Function is root of strongly connected component
+                    component = list()
+                    while True:
+                        member = component_stack.pop()
+                        on_component_stack.discard(member)
+                        component.append(member)
+                        if member == func_name:
+                            break
+                    # Recursive if component has several functions or function calls itself
+                    if len(component) > 1 or func_name in self.functions_called[func_name]:
+                        component.sort()
+                        for member in component:
+                            recursion_cycles[member] = component
+        return recursion_cycles
 
     # HIS-NRECUR
     # Number of recursions: 0
     def his_num_recursions(self):
+        recursion_cycles = self.recursiveFunctionCycles()
+        functions_by_name = dict()
+        for func in self.function_list:
+            functions_by_name.setdefault(func.name, list()).append(func)
+        reported_cycles = set()
         for func_name in self.functions_called:
-            called_functions_done = list()
-            for func_call in self.functions_called[func_name]:
-                self.isRecursiveFunctionCall(func_name, func_call, called_functions_done)
+            if func_name not in recursion_cycles:
+                continue
+            # Show members of each recursive call cycle once
+            cycle = recursion_cycles[func_name]
+            if id(cycle) not in reported_cycles:
+                reported_cycles.add(id(cycle))
+                self.statistics_list.append("HIS-NRECUR  - cycle %d (%d functions): %s" % (len(reported_cycles), len(cycle), ', '.join(cycle)))
+            for func in functions_by_name.get(func_name, list()):
+                self.reportError(func.tokenDef, 'style', 'Number of recursions: 0', 'NRECUR')
 
 
-# Main entry function
-def main():
+# Create parser of command line arguments
+def createArgumentParser():
     SUPPRESS_METRICS_HELP = '''HIS metrics to suppress (comma-separated).
 
     For example, if you'd like to suppress metrics GOTO, CALLS
@@ -702,7 +3518,63 @@ def main():
         --modify-metrics RETURN:2,PARAM:6
 
     The limits of following metrics can be changed:
-        PATH, STCYC, CALLING, CALLS, PARAM, STMT, LEVEL, RETURN
+        PATH, STCYC, CALLING, CALLS, PARAM, STMT, LEVEL, RETURN,
+        NOMV, NOMVPR
+    '''
+
+    SUMMARY_STORE_HELP = '''File to store results of dump files required to check
+    HIS-CALLING, HIS-NRECUR and HIS-VOCF across dump files.
+
+    These metrics are checked by a link step using all
+    dump files stored so far:
+        --summary-store his.db --link
+    '''
+
+    MAP_HELP = '''File to write partial result of dump files to instead of
+    checking metrics across dump files. Partial results of
+    shards of dump files are merged by a reduce step using
+    the same options (file names ending with .gz are compressed):
+        --map shard1.his.gz a.c.dump b.c.dump
+        --map shard2.his.gz c.c.dump d.c.dump
+        --reduce shard1.his.gz shard2.his.gz
+    '''
+
+    BASELINE_HELP = '''Snapshot of functions stored by --save-baseline of a
+    previous run. Functions unchanged since then are neither
+    checked nor reported. New, changed and deleted statements
+    are counted (HIS-SNEW, HIS-SCHG, HIS-SDEL):
+        --baseline his-baseline.json --save-baseline his-baseline.json
+    '''
+
+    OUTPUT_FORMAT_HELP = '''Format of diagnostics (default: text). jsonl writes a
+    line of JSON per diagnostic as read by Cppcheck, sarif
+    writes a SARIF log after all dump files are checked:
+        --output-format sarif --output-file his.sarif
+    '''
+
+    COMPILE_COMMANDS_HELP = '''Compilation database of sources to check. Cppcheck
+    writes dump files of the sources in parallel while
+    they are checked (dump file names are source file
+    names plus .dump):
+        --compile-commands build/compile_commands.json --dump-jobs 8 --delete-dumps
+    '''
+
+    CPPCHECK_HELP = '''Command writing dump files of sources (default: cppcheck).
+    Options --dump, --quiet, the preprocessor options of the
+    compile command and the source file are appended.
+    '''
+
+    WATCH_HELP = '''Check dump files again as soon as they have been changed
+    until interrupted. Dump files of directories given are
+    watched as well. Results across dump files are updated
+    without checking unchanged dump files again:
+        --watch build/dumps
+    '''
+
+    MISRA_HELP = '''Check HIS-NOMV and HIS-NOMVPR by running MISRA checker
+    of Cppcheck addons (misra.py) on the dump file data
+    parsed by HIS addon. Violations of MISRA rules aren't
+    printed but counted per dump file and rule.
     '''
 
     parser = argparse.ArgumentParser()
@@ -714,15 +3586,105 @@ def main():
     parser.add_argument("--modify-metrics", type=str, help=MODIFY_METRICS_HELP)
     parser.add_argument("--no-summary", help="hide summary of violations", action="store_true")
     parser.add_argument("--statistics", help="show statistics information", action="store_true")
-    args = parser.parse_args()
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of dump files checked in parallel")
+    parser.add_argument("--summary-store", type=str, help=SUMMARY_STORE_HELP)
+    parser.add_argument("--link", help="check metrics across all dump files of summary store", action="store_true")
+    parser.add_argument("--cache-dir", type=str, help="directory to cache results of unchanged dump files")
+    parser.add_argument("--cache-size", type=int, default=1024, help="maximum size of result cache in MB (default: 1024)")
+    parser.add_argument("--profile", help="show time, tokens and functions of each metric and dump file", action="store_true")
+    parser.add_argument("--profile-json", type=str, help="file to store profile information as JSON (implies --profile)")
+    parser.add_argument("--server", type=str, metavar="SOCKET", help="serve analysis requests on Unix domain socket")
+    parser.add_argument("--no-numpy", help="don't use NumPy to count tokens of function bodies", action="store_true")
+    parser.add_argument("--map", type=str, metavar="PARTIAL", help=MAP_HELP)
+    parser.add_argument("--reduce", help="merge partial results given instead of dump files and check metrics across them", action="store_true")
+    parser.add_argument("--baseline", type=str, metavar="SNAPSHOT", help=BASELINE_HELP)
+    parser.add_argument("--save-baseline", type=str, metavar="SNAPSHOT", help="store snapshot of checked functions used as baseline of later runs")
+    parser.add_argument("--output-format", choices=['text', 'jsonl', 'sarif'], default='text', help=OUTPUT_FORMAT_HELP)
+    parser.add_argument("--output-file", type=str, help="file to write diagnostics to instead of printing them")
+    parser.add_argument("--compile-commands", type=str, metavar="DATABASE", help=COMPILE_COMMANDS_HELP)
+    parser.add_argument("--source-dir", type=str, help="directory of sources to check like --compile-commands")
+    parser.add_argument("--cppcheck", type=str, metavar="COMMAND", default="cppcheck", help=CPPCHECK_HELP)
+    parser.add_argument("--dump-jobs", type=int, default=multiprocessing.cpu_count(), help="number of dump files written in parallel (default: number of CPUs)")
+    parser.add_argument("--misra", help=MISRA_HELP, action="store_true")
+    parser.add_argument("--misra-rules", type=str, metavar="RULES", help="MISRA rules of HIS subset (comma-separated, e.g. 14.4,15.5; default: all rules; implies --misra)")
+    parser.add_argument("--misra-rule-texts", type=str, metavar="FILE", help="MISRA rule texts file passed to misra.py (implies --misra)")
+    parser.add_argument("--watch", help=WATCH_HELP, action="store_true")
+    parser.add_argument("--watch-interval", type=float, default=1.0, metavar="SECONDS", help="interval of polling dump files in watch mode (default: 1.0)")
+    parser.add_argument("--delete-dumps", help="delete dump files written by Cppcheck after they have been checked", action="store_true")
+    return parser
+
+
+# Parse command line arguments. Arguments of sys.argv are parsed if
+# argument list isn't given.
+def parseArguments(argv=None):
+    parser = createArgumentParser()
+    args = parser.parse_args(argv)
+
+    if args.link and not args.summary_store:
+        parser.error("--link requires --summary-store")
+
+    if args.compile_commands or args.source_dir:
+        if args.compile_commands and args.source_dir:
+            parser.error("--compile-commands and --source-dir are mutually exclusive")
+        if args.dumpfile or args.reduce or args.link:
+            parser.error("--compile-commands and --source-dir can't be combined with dump files")
+
+    if args.watch:
+        for option in ['server', 'map', 'reduce', 'summary_store', 'baseline', 'save_baseline', 'compile_commands', 'source_dir']:
+            if getattr(args, option):
+                parser.error("--watch can't be combined with --%s" % option.replace('_', '-'))
+
+    if zstd is None and zstandard is None and not args.reduce:
+        if any(dumpfile.endswith('.zst') for dumpfile in args.dumpfile):
+            parser.error("dump files compressed by zstd require module zstandard")
 
     if args.cli:
         args.quiet = True
         args.no_summary = True
 
-    if args.dumpfile:
+    if args.profile_json:
+        args.profile = True
+
+    if args.misra_rules or args.misra_rule_texts:
+        args.misra = True
+    if args.misra and not importOptional('misra'):
+        parser.error("--misra requires misra.py of Cppcheck addons")
+
+    return args
+
+
+# Main entry function
+def main():
+    args = parseArguments()
+    # Progress and summary text would break JSON or SARIF written to stdout
+    if structuredStdout(args) and not args.server:
+        sys.stdout = sys.stderr
+
+    try:
+        run(args)
+    except BrokenPipeError:
+        # Reader of diagnostics exited, e.g. head. Remaining output is
+        # discarded instead of failing again when streams are flushed.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.__stdout__.fileno())
+        sys.exit(1)
+
+
+# Run mode selected by command line arguments
+def run(args):
+    if args.server:
+        if not hasattr(socketserver, 'UnixStreamServer'):
+            sys.stderr.write("Server mode requires Unix domain sockets\n")
+            sys.exit(1)
+        HisServer(args).serve(args.server)
+    elif args.watch:
+        HisWatch(args).run()
+    elif args.dumpfile or args.link or args.compile_commands or args.source_dir:
         his_checker = HisMetricChecker(args)
         his_checker.run_checks()
+        if his_checker.failed_sources:
+            sys.stderr.write("Cppcheck failed for %d source files\n" % len(his_checker.failed_sources))
+            sys.exit(1)
     else:
         if not args.quiet:
             printf("No input files.\n")
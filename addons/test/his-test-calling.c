@@ -1,4 +1,4 @@
-// HIS-COMF
+// HIS-COMF HIS-VOCF
 // Additional test code to check CALLING metric using multiple files.
 
 #include <stdio.h>
@@ -0,0 +1,57 @@
+// Test code to check NRECUR metric reporting each function of a call cycle once.
+
+// Test pattern HIS metric - Number of recursions: 0
+// Recursions are reported at the first declaration of a function.
+// Direct recursion
+unsigned int his_nrecur_direct(unsigned int n) // HIS-NRECUR
+{
+    return (n > 0U) ? (n + his_nrecur_direct(n - 1U)) : 0U;
+}
+
+// Mutual recursion of two functions
+int his_nrecur_is_odd(unsigned int n); // HIS-NRECUR
+
+int his_nrecur_is_even(unsigned int n) // HIS-NRECUR
+{
+    return (n == 0U) ? 1 : his_nrecur_is_odd(n - 1U);
+}
+
+int his_nrecur_is_odd(unsigned int n)
+{
+    return (n == 0U) ? 0 : his_nrecur_is_even(n - 1U);
+}
+
+// Call cycle of three functions called twice each
+void his_nrecur_cycle_b(int n); // HIS-NRECUR
+void his_nrecur_cycle_c(int n); // HIS-NRECUR
+
+void his_nrecur_cycle_a(int n) // HIS-NRECUR
+{
+    if (n > 0) {
+        his_nrecur_cycle_b(n - 1);
+        his_nrecur_cycle_c(n - 2);
+    }
+}
+
+void his_nrecur_cycle_b(int n)
+{
+    if (n > 0) {
+        his_nrecur_cycle_c(n - 1);
+        his_nrecur_cycle_a(n - 2);
+    }
+}
+
+void his_nrecur_cycle_c(int n)
+{
+    if (n > 0) {
+        his_nrecur_cycle_a(n - 1);
+        his_nrecur_cycle_b(n - 2);
+    }
+}
+
+// Calling functions of call cycles without being part of them: pass
+int his_nrecur_pass(void)
+{
+    his_nrecur_cycle_a(3);
+    return his_nrecur_is_even(his_nrecur_direct(4U));
+}
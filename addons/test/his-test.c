@@ -1,4 +1,4 @@
-// HIS-COMF
+// HIS-COMF HIS-VOCF
 // Main test code for HIS metric checkers
 
 #include <stdio.h>